@@ -225,6 +225,11 @@ def main():
         window.expose(Gv_api.logs_api.clear_logs)
         window.expose(Gv_api.logs_api.setup_logging_redirect)
         
+        # 暴露运行指标API函数
+        Gv_api.metrics_api.set_window(window)
+        window.expose(Gv_api.metrics_api.get_metrics)
+        window.expose(Gv_api.metrics_api.reset_metrics)
+        
         # 暴露提示信息API函数
         Gv_api.tips_api.set_window(window)
         window.expose(Gv_api.tips_api.show_tip)
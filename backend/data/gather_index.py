@@ -0,0 +1,168 @@
+"""
+采集物品索引
+gather_info的只读索引，从生成的JSON缓存加载，不需要在导入时执行gather_info中的大字典，
+并预先建立按职业、等级段、采集笔记页和采集点序号的索引。
+
+gather_info.py修改后重新生成缓存：
+    python -m backend.data.gather_index
+缓存缺失或与gather_info.py不一致时自动从gather_info.py加载。
+"""
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(DATA_DIR, "gather_info.py")
+CACHE_PATH = os.path.join(DATA_DIR, "gather_info.json")
+CACHE_VERSION = 1
+FIELDS = ("name", "job", "level", "note_index", "gather_index")
+
+# 采集笔记每个等级段包含的等级数
+LEVEL_BAND_SIZE = 5
+# 采集笔记每页显示的物品数
+NOTE_PAGE_SIZE = 6
+
+
+class GatherItem(NamedTuple):
+    """采集物品信息"""
+    name: str
+    job: str            # 职业
+    level: int          # 等级
+    note_index: int     # 在采集笔记等级段中的位置，从1开始
+    gather_index: int   # 在采集点物品列表中的位置，从1开始
+
+    @property
+    def level_band(self) -> int:
+        """采集笔记等级段，从0开始"""
+        return level_band(self.level)
+
+    @property
+    def note_page(self) -> int:
+        """在采集笔记等级段中的页码，从0开始"""
+        return (self.note_index - 1) // NOTE_PAGE_SIZE
+
+
+def level_band(level: int) -> int:
+    """等级对应的采集笔记等级段：1-5级为0，6-10级为1，以此类推"""
+    return (level - 1) // LEVEL_BAND_SIZE
+
+
+class GatherIndex(Mapping):
+    """
+    采集物品的只读索引，按名称访问返回GatherItem，其余查询结果为按采集笔记位置排序的元组
+
+    使用示例：
+    ```python
+    gather_items['铜矿'].level                     # 按名称查询
+    gather_items.by_level_band('采矿工', 50)       # 46-50级的采矿工物品，按笔记位置排序
+    gather_items.query(job='园艺工', max_level=20)
+    ```
+    """
+
+    def __init__(self, items: List[GatherItem]):
+        self._items: Dict[str, GatherItem] = {item.name: item for item in items}
+        by_job: Dict[str, List[GatherItem]] = {}
+        by_band: Dict[Tuple[str, int], List[GatherItem]] = {}
+        by_gather_index: Dict[int, List[GatherItem]] = {}
+        for item in self._items.values():
+            by_job.setdefault(item.job, []).append(item)
+            by_band.setdefault((item.job, item.level_band), []).append(item)
+            by_gather_index.setdefault(item.gather_index, []).append(item)
+        note_order = lambda item: (item.level_band, item.note_index)
+        self._by_job = {job: tuple(sorted(v, key=note_order)) for job, v in by_job.items()}
+        self._by_band = {key: tuple(sorted(v, key=note_order)) for key, v in by_band.items()}
+        self._by_gather_index = {key: tuple(sorted(v, key=lambda item: (item.job, *note_order(item))))
+                                 for key, v in by_gather_index.items()}
+
+    # ---------- Mapping ----------
+
+    def __getitem__(self, name: str) -> GatherItem:
+        return self._items[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # ---------- 查询 ----------
+
+    def jobs(self) -> Tuple[str, ...]:
+        """所有职业"""
+        return tuple(self._by_job)
+
+    def by_job(self, job: str) -> Tuple[GatherItem, ...]:
+        """职业的所有物品，按等级段和笔记位置排序"""
+        return self._by_job.get(job, ())
+
+    def by_level_band(self, job: str, level: int) -> Tuple[GatherItem, ...]:
+        """职业在level所在等级段的物品，按笔记位置排序"""
+        return self._by_band.get((job, level_band(level)), ())
+
+    def by_note_page(self, job: str, level: int, page: int) -> Tuple[GatherItem, ...]:
+        """职业在level所在等级段第page页（从0开始）的物品"""
+        return self.by_level_band(job, level)[page * NOTE_PAGE_SIZE:(page + 1) * NOTE_PAGE_SIZE]
+
+    def by_gather_index(self, gather_index: int) -> Tuple[GatherItem, ...]:
+        """在采集点物品列表中位于gather_index的物品"""
+        return self._by_gather_index.get(gather_index, ())
+
+    def query(self, job: Optional[str] = None, min_level: int = 1, max_level: Optional[int] = None) -> Tuple[GatherItem, ...]:
+        """按职业和等级范围筛选，按职业、等级段和笔记位置排序"""
+        jobs = [job] if job is not None else self._by_job
+        return tuple(item for name in jobs for item in self.by_job(name)
+                     if item.level >= min_level and (max_level is None or item.level <= max_level))
+
+
+def _source_digest() -> str:
+    """gather_info.py的内容哈希，用于判断缓存是否过期"""
+    with open(SOURCE_PATH, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _items_from_source() -> List[GatherItem]:
+    from .gather_info import gather_info
+    return [GatherItem(name, info["job"], info["level"], info["note_index"], info["gather_index"])
+            for name, info in gather_info.items()]
+
+
+def build_cache(path: str = CACHE_PATH) -> int:
+    """从gather_info.py生成JSON缓存，返回物品数量"""
+    items = _items_from_source()
+    cache = {
+        "version": CACHE_VERSION,
+        "source_sha1": _source_digest(),
+        "fields": FIELDS,
+        "items": [list(item) for item in items],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    return len(items)
+
+
+def load(path: str = CACHE_PATH) -> GatherIndex:
+    """加载索引，缓存缺失或过期时从gather_info.py加载"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") != CACHE_VERSION or tuple(cache.get("fields", ())) != FIELDS:
+            raise ValueError("缓存版本不匹配")
+        if os.path.exists(SOURCE_PATH) and cache.get("source_sha1") != _source_digest():
+            raise ValueError("缓存与gather_info.py不一致")
+        return GatherIndex([GatherItem(*row) for row in cache["items"]])
+    except Exception as e:
+        # 只在开发环境（有gather_info.py源文件）提示重新生成缓存，打包后缓存缺失时直接加载
+        if os.path.exists(SOURCE_PATH):
+            print(f"采集物品缓存不可用，从gather_info.py加载: {e}")
+        return GatherIndex(_items_from_source())
+
+
+# 全局采集物品索引
+gather_items = load()
+
+
+if __name__ == '__main__':
+    print(f"已生成 {CACHE_PATH}，物品数量 {build_cache()}")
@@ -0,0 +1,51 @@
+import cv2
+from typing import List, Optional, Tuple
+from abc import ABC, abstractmethod
+
+
+class CaptureSource(ABC):
+    """
+    截图源抽象基类
+
+    脚本只通过screencap获取画面，实现类可以是模拟器截图（MuMuCap），
+    也可以是录制文件回放（ReplayCap），便于在没有模拟器的环境下测试和测速。
+    实现类需要设置width和height属性。
+    """
+    width: int = 0
+    height: int = 0
+
+    @abstractmethod
+    def screencap(self, region: Optional[List[int]] = None) -> cv2.Mat:
+        """
+        获取当前画面
+        :param region: 截图区域 [x, y, w, h]，默认为None表示整个画面
+        :return: BGR格式的图像，失败时返回None
+        """
+        pass
+
+    @abstractmethod
+    def set_fps(self, fps: int):
+        """
+        设置截图的最大帧率
+        :param fps: 每秒截图次数上限
+        """
+        pass
+
+    def _clip_region(self, region: List[int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        将截图区域限制在画面范围内
+        :param region: 截图区域 [x, y, w, h]
+        :return: 有效区域 (x, y, w, h)，区域无效时返回None
+        """
+        try:
+            x, y, w, h = (int(v) for v in region)
+        except (TypeError, ValueError):
+            return None
+        # 确保坐标在有效范围内
+        x = max(0, min(x, self.width - 1))
+        y = max(0, min(y, self.height - 1))
+        w = min(w, self.width - x)
+        h = min(h, self.height - y)
+        if w <= 0 or h <= 0:
+            return None
+        return x, y, w, h
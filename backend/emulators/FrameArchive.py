@@ -0,0 +1,178 @@
+import json
+import zipfile
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# 归档格式版本
+ARCHIVE_VERSION = 1
+# 帧索引文件名
+INDEX_NAME = "frames.json"
+
+
+class FrameArchiveWriter:
+    """
+    录制帧归档写入器
+
+    归档是一个zip文件：
+    - frames.json 记录每一帧的时间戳、类型和文件名
+    - 关键帧保存为无损PNG
+    - 其余帧保存为与上一帧按位异或后的PNG，画面静止的部分异或结果为0，压缩率很高
+    - 其他数据（例如事件日志）可以通过write_json写入同一个归档
+
+    使用示例：
+    ```python
+    writer = FrameArchiveWriter("session.zip")
+    writer.add(frame, time.time())
+    writer.close()
+    ```
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = 30):
+        """
+        :param path: 归档文件路径
+        :param keyframe_interval: 关键帧间隔，回放时随机访问最多需要解码这么多帧
+        """
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+        self._frames = []
+        self._prev = None
+        self._meta = {}
+
+    def add(self, frame: np.ndarray, timestamp: float):
+        """
+        添加一帧
+        :param frame: BGR图像
+        :param timestamp: 截图时间（秒）
+        """
+        index = len(self._frames)
+        is_key = (self._prev is None or index % self.keyframe_interval == 0
+                  or self._prev.shape != frame.shape)
+        data = frame if is_key else cv2.bitwise_xor(frame, self._prev)
+        ok, encoded = cv2.imencode('.png', data, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not ok:
+            print(f"帧编码失败: {index}")
+            return
+        name = f"{index:06d}.png"
+        # PNG已经压缩过，直接存储
+        self._zip.writestr(name, encoded.tobytes())
+        self._frames.append({'t': timestamp, 'key': is_key, 'file': name})
+        self._prev = frame.copy()
+
+    def write_json(self, name: str, data: Any):
+        """
+        向归档中写入一个JSON文件
+        :param name: 文件名
+        :param data: 可以被json序列化的数据
+        """
+        self._zip.writestr(name, json.dumps(data, ensure_ascii=False),
+                           compress_type=zipfile.ZIP_DEFLATED)
+
+    def set_meta(self, **meta):
+        """设置归档的附加信息，例如帧率、脚本名称"""
+        self._meta.update(meta)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def close(self):
+        """写入帧索引并关闭归档"""
+        if self._zip is None:
+            return
+        self.write_json(INDEX_NAME, {
+            'version': ARCHIVE_VERSION,
+            'keyframe_interval': self.keyframe_interval,
+            'meta': self._meta,
+            'frames': self._frames,
+        })
+        self._zip.close()
+        self._zip = None
+        self._prev = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameArchiveReader:
+    """
+    录制帧归档读取器
+
+    顺序读取时每帧只需要解码一次，随机访问时从最近的关键帧开始解码。
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: 归档文件路径
+        """
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'r')
+        index = json.loads(self._zip.read(INDEX_NAME))
+        if index.get('version') != ARCHIVE_VERSION:
+            print(f"不支持的归档版本: {index.get('version')}")
+        self.meta: Dict[str, Any] = index.get('meta', {})
+        self._frames: List[Dict[str, Any]] = index['frames']
+        self.timestamps: List[float] = [f['t'] for f in self._frames]
+        self._cache_index = -1
+        self._cache_frame = None
+
+    def __len__(self):
+        return len(self._frames)
+
+    def names(self) -> List[str]:
+        """归档中的全部文件名"""
+        return self._zip.namelist()
+
+    def read_json(self, name: str) -> Optional[Any]:
+        """
+        读取归档中的JSON文件
+        :param name: 文件名
+        :return: 解析后的数据，文件不存在时返回None
+        """
+        if name not in self._zip.namelist():
+            return None
+        return json.loads(self._zip.read(name))
+
+    def _decode(self, index: int) -> np.ndarray:
+        """解码单个帧文件（关键帧为原图，其余为异或差分）"""
+        data = np.frombuffer(self._zip.read(self._frames[index]['file']), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+
+    def read(self, index: int) -> np.ndarray:
+        """
+        读取指定帧
+        :param index: 帧序号
+        :return: BGR图像（只读，需要修改时请调用copy()）
+        """
+        if index == self._cache_index:
+            return self._cache_frame
+        # 顺序读取时从缓存的上一帧继续，否则从最近的关键帧开始
+        if self._cache_index >= 0 and self._cache_index < index and not any(
+                self._frames[i]['key'] for i in range(self._cache_index + 1, index + 1)):
+            start, frame = self._cache_index + 1, self._cache_frame
+        else:
+            start = index
+            while not self._frames[start]['key']:
+                start -= 1
+            frame = None
+        for i in range(start, index + 1):
+            data = self._decode(i)
+            frame = data if self._frames[i]['key'] else cv2.bitwise_xor(data, frame)
+        frame.flags.writeable = False
+        self._cache_index, self._cache_frame = index, frame
+        return frame
+
+    def close(self):
+        """关闭归档"""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
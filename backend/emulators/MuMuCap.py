@@ -2,10 +2,21 @@ import ctypes
 import cv2
 import numpy as np
 import os
+import threading
 import time
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from .CaptureSource import CaptureSource
 
-class MuMuCap:
+# 输出缓冲区轮换数量：调用方最多可同时持有的截图数
+FRAME_BUFFER_COUNT = 3
+# 后台截图模式下的缓冲区轮换数量，保证调用方拿到的帧在约半秒内不会被覆盖
+STREAM_BUFFER_COUNT = 8
+# 后台截图模式下screencap等待第一帧的最长时间（秒）
+STREAM_WAIT_TIMEOUT = 1.0
+# 后台截图模式下最新一帧超过该帧数的间隔仍未更新时认为截图失败
+STREAM_STALE_FRAMES = 5
+
+class MuMuCap(CaptureSource):
     """
     MuMu模拟器截图工具类
     
@@ -27,6 +38,12 @@ class MuMuCap:
     # 显示图片
     cv2.imshow("Screenshot", image)
     cv2.waitKey(0)
+    
+    # 后台截图模式：截图线程按帧率持续截图，screencap直接返回最新一帧
+    cap.start_stream()
+    image, seq, timestamp = cap.get_latest_frame()
+    image, seq, timestamp = cap.wait_for_new_frame(seq)  # 等待下一帧
+    cap.stop_stream()
     ```
     """
     
@@ -52,6 +69,18 @@ class MuMuCap:
         self.emulator_install_path = emulator_install_path
         self.fps = fps
         self.last_capture_time = 0  # 上次截图时间
+        self._frame_buffers = {}     # 按尺寸缓存的输出缓冲区 {(h, w): [buffer, ...]}
+        self._frame_buffer_index = {}  # 每种尺寸下次使用的缓冲区下标
+        self._buffer_count = FRAME_BUFFER_COUNT
+        
+        # 后台截图线程
+        self._stream_thread = None
+        self._stream_running = False
+        self._stream_stopping = False    # 已请求停止，截图线程结束前_stream_running仍为True
+        self._frame_cond = threading.Condition()
+        self._latest_frame = None    # 最新一帧
+        self.frame_seq = 0           # 最新一帧的序号，从1开始递增
+        self.frame_time = 0.0        # 最新一帧的截图时间
         
         # DLL文件路径
         self.dll_path = os.path.join(self.emulator_install_path, "shell/sdk/external_renderer_ipc.dll")
@@ -134,27 +163,103 @@ class MuMuCap:
         """
         将像素缓冲区转换为OpenCV图像格式
         
+        一次cvtColor(RGBA到BGR)加原地上下翻转，直接写入轮换的输出缓冲区，不再分配新数组
+        
         Returns:
             cv2.Mat: OpenCV格式的图像
         """
-        # 将像素数据转换为numpy数组并重塑为图像格式
+        return self._region_to_opencv(0, 0, self.width, self.height)
+        
+    def _next_buffer(self, height: int, width: int) -> np.ndarray:
+        """
+        按尺寸轮换取出一块可复用的BGR输出缓冲区，避免每次截图都重新分配内存
+        
+        Args:
+            height (int): 图像高度
+            width (int): 图像宽度
+        
+        Returns:
+            np.ndarray: 形状为 (height, width, 3) 的缓冲区
+        """
+        key = (height, width)
+        buffers = self._frame_buffers.get(key)
+        if buffers is None:
+            buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(self._buffer_count)]
+            self._frame_buffers[key] = buffers
+            self._frame_buffer_index[key] = 0
+        index = self._frame_buffer_index[key]
+        self._frame_buffer_index[key] = (index + 1) % len(buffers)
+        return buffers[index]
+        
+    def _region_to_opencv(self, x: int, y: int, w: int, h: int) -> cv2.Mat:
+        """
+        只转换像素缓冲区中的指定区域
+        
+        DLL返回的像素是自下而上存储的，画面中的 [y, y+h) 行对应缓冲区中的
+        [height-y-h, height-y) 行。只对这部分行列做RGBA到BGR的转换和上下翻转，
+        结果写入可复用的输出缓冲区。
+        
+        Args:
+            x, y, w, h (int): 已限制在画面范围内的区域
+        
+        Returns:
+            cv2.Mat: OpenCV格式的区域图像
+        """
         pixel_array = np.frombuffer(self.pixels, dtype=np.uint8).reshape((self.height, self.width, 4))
-        # 转换颜色空间从RGBA到RGB，并翻转图像
-        return cv2.cvtColor(pixel_array[::-1, :, [2, 1, 0]], cv2.COLOR_RGBA2RGB)
+        rows = pixel_array[self.height - y - h:self.height - y, x:x + w]
+        output = self._next_buffer(h, w)
+        cv2.cvtColor(rows, cv2.COLOR_RGBA2BGR, dst=output)
+        cv2.flip(output, 0, dst=output)
+        return output
+        
+    def _capture_display(self) -> bool:
+        """
+        调用DLL把当前画面截取到像素缓冲区
+        
+        Returns:
+            bool: 截图是否成功
+        """
+        result = self.nemu.nemu_capture_display(
+            self.handle,
+            self.display_id,
+            self.buffer_size,
+            ctypes.c_int(self.width),
+            ctypes.c_int(self.height),
+            self.pixels,
+        )
+        return result <= 1
         
     def screencap(self, region: Optional[List[int]] = None) -> cv2.Mat:
         """
         截取模拟器画面，并根据设置的帧率控制截图频率
         
+        后台截图模式下（见start_stream）不再等待和截图，直接返回最新一帧
+        
         Args:
             region (Optional[List[int]], optional): 截图区域 [x, y, w, h]，默认为None表示截取整个画面
         
         Returns:
-            cv2.Mat: OpenCV格式的截图
+            cv2.Mat: OpenCV格式的截图。返回的图像使用轮换的输出缓冲区（见FRAME_BUFFER_COUNT），
+                     需要长期保存时请调用copy()
             
         Raises:
             BufferError: 截图失败时抛出异常
         """
+        if self._stream_running:
+            latest = self.get_latest_frame(STREAM_WAIT_TIMEOUT)
+            if latest is None:
+                return None
+            # 截图线程持续失败时不返回过期的画面
+            if time.time() - latest[2] > STREAM_STALE_FRAMES / self.fps:
+                return None
+            image = latest[0]
+            if region is not None:
+                clipped = self._clip_region(region)
+                if clipped is not None:
+                    x, y, w, h = clipped
+                    return image[y:y+h, x:x+w]
+            return image
+            
         current_time = time.time()
         min_interval = 1.0 / self.fps
         
@@ -168,39 +273,18 @@ class MuMuCap:
         # 更新上次截图时间
         self.last_capture_time = time.time()
         
-        result = self.nemu.nemu_capture_display(
-            self.handle,
-            self.display_id,
-            self.buffer_size,
-            ctypes.c_int(self.width),
-            ctypes.c_int(self.height),
-            self.pixels,
-        )
-        
-        if result > 1:
+        if not self._capture_display():
             return None
             raise BufferError("截图失败")
             
-        # 获取完整图像
-        full_image = self._buffer_to_opencv()
-        
-        # 如果指定了区域，则截取对应区域
+        # 如果指定了区域，则只转换对应区域
         if region is not None:
-            try:
-                x, y, w, h = region
-                # 确保坐标在有效范围内
-                x = max(0, min(x, self.width - 1))
-                y = max(0, min(y, self.height - 1))
-                w = min(w, self.width - x)
-                h = min(h, self.height - y)
+            clipped = self._clip_region(region)
+            if clipped is not None:
+                return self._region_to_opencv(*clipped)
+            # 区域无效时返回完整图像
                 
-                # 截取区域
-                return full_image[y:y+h, x:x+w]
-            except Exception:
-                # 如果截取失败，返回完整图像
-                return full_image
-                
-        return full_image
+        return self._buffer_to_opencv()
     
     def set_fps(self, fps: int):
         """
@@ -211,8 +295,94 @@ class MuMuCap:
         """
         self.fps = fps
         
+    def start_stream(self):
+        """
+        启动后台截图线程
+        
+        截图线程按fps持续截图，screencap直接返回最新一帧，不再阻塞等待
+        """
+        if self._stream_running:
+            return
+        # 调用方持有的帧可能更久，加大缓冲区轮换数量
+        self._buffer_count = STREAM_BUFFER_COUNT
+        self._frame_buffers = {}
+        self._frame_buffer_index = {}
+        self._stream_stopping = False
+        self._stream_running = True
+        self._stream_thread = threading.Thread(target=self._stream_loop, name="MuMuCapStream", daemon=True)
+        self._stream_thread.start()
+        
+    def stop_stream(self):
+        """停止后台截图线程，之后screencap恢复同步截图"""
+        if not self._stream_running or self._stream_stopping:
+            return
+        self._stream_stopping = True
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        if self._stream_thread is not None and self._stream_thread is not threading.current_thread():
+            self._stream_thread.join()
+        self._stream_thread = None
+        # 截图线程结束后才切换为同步截图，避免与线程的最后一次截图同时使用模拟器连接和缓冲区
+        self._stream_running = False
+        self._stream_stopping = False
+        
+    def is_streaming(self) -> bool:
+        """后台截图线程是否在运行"""
+        return self._stream_running
+        
+    def _stream_loop(self):
+        """后台截图线程：按fps截图并发布最新一帧"""
+        while not self._stream_stopping:
+            begin = time.time()
+            try:
+                if self._capture_display():
+                    image = self._buffer_to_opencv()
+                    with self._frame_cond:
+                        self._latest_frame = image
+                        self.frame_seq += 1
+                        self.frame_time = begin
+                        self._frame_cond.notify_all()
+            except Exception as e:
+                print(f"后台截图失败: {e}")
+            # 按帧率等待下一次截图
+            wait = 1.0 / self.fps - (time.time() - begin)
+            if wait > 0:
+                time.sleep(wait)
+                
+    def get_latest_frame(self, timeout: Optional[float] = None) -> Optional[Tuple[cv2.Mat, int, float]]:
+        """
+        获取后台截图线程的最新一帧，还没有截到任何画面时等待第一帧
+        
+        Args:
+            timeout (Optional[float], optional): 等待第一帧的超时时间（秒），默认为None表示一直等待
+        
+        Returns:
+            Optional[Tuple[cv2.Mat, int, float]]: (图像, 帧序号, 截图时间)，超时或截图线程已停止时返回None
+        """
+        return self.wait_for_new_frame(0, timeout)
+        
+    def wait_for_new_frame(self, after_seq: int, timeout: Optional[float] = None) -> Optional[Tuple[cv2.Mat, int, float]]:
+        """
+        等待序号大于after_seq的新一帧，用于需要保证画面是最新的调用方（例如点击之后）
+        
+        Args:
+            after_seq (int): 已经处理过的帧序号
+            timeout (Optional[float], optional): 超时时间（秒），默认为None表示一直等待
+        
+        Returns:
+            Optional[Tuple[cv2.Mat, int, float]]: (图像, 帧序号, 截图时间)，超时或截图线程已停止时返回None
+        """
+        with self._frame_cond:
+            ready = self._frame_cond.wait_for(
+                lambda: self.frame_seq > after_seq or self._stream_stopping or not self._stream_running, timeout)
+            if not ready or self.frame_seq <= after_seq:
+                return None
+            return self._latest_frame, self.frame_seq, self.frame_time
+        
     def __del__(self):
         """析构函数，断开与模拟器的连接"""
+        if getattr(self, '_stream_running', False):
+            self.stop_stream()
         if hasattr(self, 'nemu') and hasattr(self, 'handle'):
             self.nemu.nemu_disconnect(self.handle)
 
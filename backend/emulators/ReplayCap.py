@@ -0,0 +1,204 @@
+import bisect
+import os
+import time
+import cv2
+import numpy as np
+from typing import Callable, List, Optional
+from .CaptureSource import CaptureSource
+from .FrameArchive import FrameArchiveReader
+
+# 支持的图片和视频扩展名
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTS = ('.mp4', '.avi', '.mkv')
+
+
+class ReplayCap(CaptureSource):
+    """
+    录制画面回放截图源
+
+    用录制好的画面代替模拟器截图，脚本无需修改即可在没有模拟器的环境下运行。
+    支持以下来源：
+    1. PNG/JPG图片目录，按文件名排序，帧间隔为1/fps
+    2. mp4等视频文件，帧间隔取视频自身帧率
+    3. FrameArchiveWriter录制的帧归档(.zip)，使用录制时的时间戳
+
+    回放速度：
+    - speed > 0 时按时间回放，speed=1为实时，speed=10为10倍速
+    - speed = 0 时每次screencap前进一帧，用于测量最大吞吐
+
+    使用示例：
+    ```python
+    # 用录制的会话代替模拟器截图
+    paras.emulator_api['cap'] = ReplayCap("session.zip", speed=10)
+    ```
+    """
+
+    def __init__(
+            self,
+            source: str,
+            speed: float = 1.0,
+            fps: int = 15,
+            loop: bool = False,
+            clock: Callable[[], float] = time.time
+    ):
+        """
+        初始化回放截图源
+
+        Args:
+            source (str): 图片目录、视频文件或帧归档路径
+            speed (float, optional): 回放倍速，0表示每次截图前进一帧，默认为实时
+            fps (int, optional): 图片目录的帧率，默认为15
+            loop (bool, optional): 播放结束后是否从头开始，默认为False
+            clock (Callable[[], float], optional): 时钟函数，回放测试时可以传入虚拟时钟
+        """
+        self.source = source
+        self.speed = speed
+        self.fps = fps
+        self.loop = loop
+        self.clock = clock
+        self.finished = False      # 是否已经播放到最后一帧
+        self.frame_index = -1      # 最近一次返回的帧序号
+
+        self._archive = None
+        self._video = None
+        self._files = []
+        self._video_index = -1
+        self._video_frame = None
+        self._cache_index = -1
+        self._cache_frame = None
+
+        if os.path.isdir(source):
+            self._files = sorted(os.path.join(source, f) for f in os.listdir(source)
+                                 if f.lower().endswith(IMAGE_EXTS))
+            self.timestamps = [i / fps for i in range(len(self._files))]
+        elif source.lower().endswith(VIDEO_EXTS):
+            self._video = cv2.VideoCapture(source)
+            video_fps = self._video.get(cv2.CAP_PROP_FPS) or fps
+            count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.timestamps = [i / video_fps for i in range(count)]
+        else:
+            self._archive = FrameArchiveReader(source)
+            self.timestamps = [t - self._archive.timestamps[0] for t in self._archive.timestamps]
+
+        if not self.timestamps:
+            print(f"回放源中没有画面: {source}")
+            self.width = self.height = 0
+            self.finished = True
+        else:
+            first = self._read(0)
+            if first is None:
+                raise ValueError(f"无法读取回放源的第一帧: {source}")
+            self.height, self.width = first.shape[:2]
+        self._start_time = None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _read(self, index: int) -> Optional[np.ndarray]:
+        """读取指定帧"""
+        if index == self._cache_index:
+            return self._cache_frame
+        if self._archive is not None:
+            frame = self._archive.read(index)
+        elif self._video is not None:
+            frame = self._read_video(index)
+        else:
+            # 用imdecode读取，兼容中文路径
+            frame = cv2.imdecode(np.fromfile(self._files[index], dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None:
+            frame.flags.writeable = False
+            self._cache_index, self._cache_frame = index, frame
+        return frame
+
+    def _read_video(self, index: int) -> Optional[np.ndarray]:
+        """顺序读取视频帧，向前跳帧时只grab不解码"""
+        if index < self._video_index:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._video_index = -1
+        while self._video_index < index - 1:
+            if not self._video.grab():
+                return self._video_frame
+            self._video_index += 1
+        ok, frame = self._video.read()
+        if not ok:
+            return self._video_frame
+        self._video_index = index
+        self._video_frame = frame
+        return frame
+
+    def _current_index(self) -> int:
+        """根据回放速度计算当前应该返回的帧序号"""
+        count = len(self.timestamps)
+        if self.speed <= 0:
+            index = self.frame_index + 1
+        else:
+            now = self.clock()
+            if self._start_time is None:
+                self._start_time = now
+            elapsed = (now - self._start_time) * self.speed
+            if self.loop and self.timestamps[-1] > 0:
+                elapsed %= self.timestamps[-1] + 1.0 / self.fps
+            index = max(0, bisect.bisect_right(self.timestamps, elapsed) - 1)
+        if index >= count:
+            index = 0 if self.loop else count - 1
+        self.finished = not self.loop and index == count - 1
+        return index
+
+    def screencap(self, region: Optional[List[int]] = None) -> cv2.Mat:
+        """
+        获取当前回放画面
+
+        Args:
+            region (Optional[List[int]], optional): 截图区域 [x, y, w, h]，默认为None表示整个画面
+
+        Returns:
+            cv2.Mat: 只读的BGR图像，回放源为空时返回None
+        """
+        if not self.timestamps:
+            return None
+        self.frame_index = self._current_index()
+        image = self._read(self.frame_index)
+        if image is not None and region is not None:
+            clipped = self._clip_region(region)
+            if clipped is not None:
+                x, y, w, h = clipped
+                return image[y:y+h, x:x+w]
+        return image
+
+    def set_fps(self, fps: int):
+        """
+        回放时帧率由录制内容决定，这里只记录设置值（图片目录的帧间隔在初始化时确定）
+
+        Args:
+            fps (int): 每秒截图次数上限
+        """
+        self.fps = fps
+
+    def rewind(self):
+        """从头开始回放"""
+        self._start_time = None
+        self.frame_index = -1
+        self.finished = False
+
+    def close(self):
+        """释放回放源"""
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+if __name__ == '__main__':
+    # 测试回放吞吐：python -m backend.emulators.ReplayCap <图片目录|视频|归档>
+    import sys
+
+    cap = ReplayCap(sys.argv[1], speed=0)
+    start_time = time.time()
+    frames = 0
+    while not cap.finished:
+        cap.screencap()
+        frames += 1
+    elapsed = time.time() - start_time
+    print(f"回放 {frames} 帧，耗时: {elapsed:.3f}秒，{frames / max(elapsed, 1e-9):.1f}帧/秒")
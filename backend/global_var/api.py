@@ -11,6 +11,7 @@ from ..ui_api.gathering.api import GatheringApi
 from ..ui_api.fishing.api import FishingApi
 from ..ui_api.home import HomeAPI
 from ..ui_api.goldsaucer.api import GoldSaucerApi
+from ..ui_api.metrics import MetricsAPI
 
 
 # 配置日志
@@ -24,4 +25,5 @@ gathering_api = GatheringApi()
 fishing_api = FishingApi()
 home_api = HomeAPI()
 goldsaucer_api = GoldSaucerApi()
+metrics_api = MetricsAPI()
 
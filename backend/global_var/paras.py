@@ -13,6 +13,8 @@ sys_settings = {
     'mumuPath': '',             # 模拟器路径
     'log_retention_count': 300, # 日志清空数
     'screenshot_fps': 15,       # 截图频率
+    'screenshot_stream': False,  # 是否使用后台截图线程
+    'metrics_enabled': False,    # 是否统计各阶段耗时
 }   
 
 # 连接的模拟器信息
@@ -1,7 +1,11 @@
 import cv2
+import functools
 import numpy as np
 import os
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, replace
 from typing import Optional, List, Tuple, Union, Dict, Any
 
 @dataclass
@@ -16,10 +20,25 @@ class MatchResultContainer:
     """匹配结果容器类，允许通过图片名称访问匹配结果"""
     def __init__(self):
         self._results = {}
+        self.evaluated = []  # 已执行匹配的模板名称（按顺序）
+        self.skipped = []    # first_found模式下因提前命中而跳过的模板名称
         
     def add_result(self, name: str, result: Optional[MatchResult]):
         """添加匹配结果"""
         self._results[name] = result
+        self.evaluated.append(name)
+        
+    def add_skipped(self, name: str):
+        """记录被跳过的模板，访问其结果时返回None"""
+        self.skipped.append(name)
+        
+    @property
+    def first(self) -> Optional[MatchResult]:
+        """按模板顺序第一个匹配成功的结果"""
+        for name in self.evaluated:
+            if self._results[name] is not None:
+                return self._results[name]
+        return None
         
     def __getattr__(self, name: str) -> Optional[MatchResult]:
         """通过属性访问匹配结果"""
@@ -33,32 +52,441 @@ class MatchResultContainer:
                 result.append(f"{name}: {match}")
             else:
                 result.append(f"{name}: None")
+        for name in self.skipped:
+            result.append(f"{name}: 跳过")
         return "\n".join(result)
         
     def __repr__(self) -> str:
         return self.__str__()
 
+class PreparedTemplate:
+    """预处理模板类
+    
+    在加载时一次性计算模板匹配所需的灰度图、掩码和颜色比较用的BGR图，
+    SingleMatch/MultiMatch可以直接使用，避免每次匹配重复计算。
+    """
+    def __init__(self, name: str, img: np.ndarray, params: Optional[Dict[str, Any]] = None,
+                 gray: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None):
+        """
+        参数:
+            name: 图像名称
+            img: 模板图像（BGR或BGRA）
+            params: 匹配参数，格式同[图像名称, np.ndarray, 匹配参数]中的匹配参数
+            gray: 预先计算好的灰度图，为None时自动计算
+            mask: 预先计算好的alpha掩码，为None时自动计算
+        """
+        self.name = name
+        self.img = img
+        self.params = dict(params) if params else {}
+        self.shape = img.shape
+        self.gray = gray if gray is not None else _template_gray(img)
+        # alpha通道掩码优先，没有alpha通道时才会用到绿色掩码
+        self.alpha_mask = mask if mask is not None else _template_alpha_mask(img)
+        self._green_mask = None
+        if self.alpha_mask is None and self.params.get('green_mask', False):
+            self._green_mask = _template_green_mask(img)
+        # 特征匹配使用的特征点和描述符，按检测器缓存
+        self._features = {}
+        self._features_lock = threading.Lock()
+        # 颜色敏感匹配使用的BGR浮点图
+        self._color = None
+        if self.params.get('color_sensitive', False):
+            self._color = _template_bgr(img).astype(np.float32)
+
+    @property
+    def color(self) -> np.ndarray:
+        """颜色敏感匹配使用的BGR浮点图"""
+        if self._color is None:
+            self._color = _template_bgr(self.img).astype(np.float32)
+        return self._color
+
+    def get_features(self, detector: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """获取模板在指定检测器下的特征点坐标和描述符（首次调用时计算并缓存）
+        
+        返回:
+            (特征点坐标 Nx2 float32, 描述符)，检测失败时为(None, None)
+        """
+        features = self._features.get(detector)
+        if features is None:
+            with self._features_lock:
+                features = self._features.get(detector)
+                if features is None:
+                    keypoints, descriptors = _get_detector(detector).detectAndCompute(self.img, None)
+                    points = cv2.KeyPoint_convert(keypoints) if keypoints else None
+                    features = (points, descriptors)
+                    self._features[detector] = features
+        return features
+
+    def get_mask(self, green_mask: bool = False) -> Optional[np.ndarray]:
+        """获取匹配掩码，规则与TemplateMatch一致"""
+        if self.alpha_mask is not None:
+            return self.alpha_mask
+        if green_mask:
+            if self._green_mask is None:
+                self._green_mask = _template_green_mask(self.img)
+            return self._green_mask
+        return None
+
+    def __repr__(self) -> str:
+        return f"PreparedTemplate({self.name}, shape={self.shape}, params={self.params})"
+
+
+def _template_gray(template: np.ndarray) -> np.ndarray:
+    """模板灰度化"""
+    if len(template.shape) == 2:
+        return template
+    if template.shape[2] == 4:
+        return cv2.cvtColor(template, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+
+
+def _template_alpha_mask(template: np.ndarray) -> Optional[np.ndarray]:
+    """由alpha通道得到0/1掩码，没有alpha通道时返回None"""
+    if len(template.shape) == 3 and template.shape[2] == 4:
+        _, mask = cv2.threshold(template[:, :, 3], 127, 1, cv2.THRESH_BINARY)
+        return mask
+    return None
+
+
+def _template_green_mask(template: np.ndarray) -> np.ndarray:
+    """排除模板中纯绿色(0,255,0)像素的掩码"""
+    mask = np.ones(template.shape[:2], dtype=np.uint8) * 255
+    if len(template.shape) == 3:
+        green_pixels = np.all(template[:, :, :3] == [0, 255, 0], axis=2)
+        mask[green_pixels] = 0
+    return mask
+
+
+def _template_bgr(template: np.ndarray) -> np.ndarray:
+    """颜色比较用的BGR图像"""
+    if len(template.shape) == 3 and template.shape[2] == 4:
+        return cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
+    return template
+
+
+class FrameContext:
+    """截图预处理上下文
+    
+    同一张截图在多个模板之间共享灰度图和HSV图：
+    ROI较大时整张截图只灰度化一次，之后各ROI直接切片；
+    ROI较小时只转换该ROI。转换结果按裁剪后的区域缓存，区域相同或重叠的模板不会重复转换。
+    """
+    # ROI面积超过整图的该比例时，直接灰度化整张截图
+    FULL_GRAY_RATIO = 0.25
+
+    def __init__(self, img: np.ndarray):
+        self.img = img
+        self.shape = img.shape
+        self._gray = None
+        self._hsv = None
+        self._roi_gray = {}
+        self._roi_hsv = {}
+
+    def clip_region(self, region: Optional[List[int]]) -> Tuple[int, int, int, int]:
+        """将区域[x, y, w, h]裁剪到图像范围内"""
+        if region is None:
+            return 0, 0, self.shape[1], self.shape[0]
+        roi_x, roi_y, roi_w, roi_h = region
+        roi_x = max(0, min(roi_x, self.shape[1] - 1))
+        roi_y = max(0, min(roi_y, self.shape[0] - 1))
+        roi_w = min(roi_w, self.shape[1] - roi_x)
+        roi_h = min(roi_h, self.shape[0] - roi_y)
+        return roi_x, roi_y, roi_w, roi_h
+
+    @property
+    def gray(self) -> np.ndarray:
+        """整张截图的灰度图（只转换一次）"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.img, cv2.COLOR_BGR2GRAY) if len(self.shape) == 3 else self.img
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """整张截图的HSV图（只转换一次）"""
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.img, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    def roi(self, rect: Tuple[int, int, int, int]) -> np.ndarray:
+        """ROI区域的原图视图，rect为clip_region的返回值"""
+        x, y, w, h = rect
+        return self.img[y:y + h, x:x + w]
+
+    def roi_gray(self, rect: Tuple[int, int, int, int]) -> np.ndarray:
+        """ROI区域的灰度图（缓存），rect为clip_region的返回值"""
+        roi_gray = self._roi_gray.get(rect)
+        if roi_gray is None:
+            x, y, w, h = rect
+            if self._gray is not None or w * h >= self.FULL_GRAY_RATIO * self.shape[0] * self.shape[1]:
+                roi_gray = self.gray[y:y + h, x:x + w]
+            else:
+                roi = self.roi(rect)
+                roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if len(roi.shape) == 3 else roi
+            self._roi_gray[rect] = roi_gray
+        return roi_gray
+
+    def roi_hsv(self, rect: Tuple[int, int, int, int]) -> np.ndarray:
+        """ROI区域的HSV图（缓存），rect为clip_region的返回值"""
+        roi_hsv = self._roi_hsv.get(rect)
+        if roi_hsv is None:
+            x, y, w, h = rect
+            if self._hsv is not None:
+                roi_hsv = self._hsv[y:y + h, x:x + w]
+            else:
+                roi_hsv = cv2.cvtColor(self.roi(rect), cv2.COLOR_BGR2HSV)
+            self._roi_hsv[rect] = roi_hsv
+        return roi_hsv
+
+
+class MatchCache:
+    """匹配结果缓存（画面变化检测）
+    
+    对每个模板记录上次匹配时ROI灰度图的缩略图签名，
+    下一帧ROI缩略图与签名的差异不超过tolerance时认为画面未变化，直接返回上次匹配结果的副本，
+    跳过模板匹配。适用于长时间等待静止画面的轮询循环。
+    缩略图按固定的格子大小缩小，ROI越大缩略图越大，大ROI中小图标的出现或消失不会被平均掉。
+    颜色敏感（color_sensitive）的模板使用彩色缩略图作为签名，只有颜色变化的画面也能检测到。
+    每个脚本实例单独使用一个缓存，不要在多个线程之间共享。
+    """
+    def __init__(self, tolerance: int = 1, cell_size: int = 4):
+        """
+        参数:
+            tolerance: 缩略图逐像素允许的最大灰度差
+            cell_size: 缩略图每个像素对应的原图边长，为1时直接比较原始灰度图。
+                       单个像素的变化也会使缩略图改变 灰度差 / cell_size² ，默认值下255的变化约为16
+        """
+        self.tolerance = tolerance
+        self.cell_size = max(1, cell_size)
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, frame: FrameContext, rect: Tuple[int, int, int, int], color: bool = False) -> np.ndarray:
+        """ROI灰度图（color为True时为彩色图）的缩略图签名"""
+        roi = frame.roi(rect) if color else frame.roi_gray(rect)
+        if self.cell_size == 1:
+            return roi.astype(np.int16)
+        h, w = roi.shape[:2]
+        size = (-(-w // self.cell_size), -(-h // self.cell_size))
+        return cv2.resize(roi, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def lookup(self, frame: FrameContext, template_info: Union[PreparedTemplate, List[Any]]):
+        """查询缓存
+        
+        返回:
+            (是否命中, 缓存的匹配结果, 写回缓存用的标记)，模板无效时返回None
+        """
+        unpacked = _unpack_template(template_info)
+        if unpacked is None or unpacked[1] is None or not isinstance(unpacked[2], dict):
+            return None
+        name, _, params = unpacked
+        rect = frame.clip_region(params.get('region'))
+        if rect[2] <= 0 or rect[3] <= 0:
+            return None
+        key = (name, repr(sorted(params.items(), key=lambda item: item[0])))
+        signature = self._signature(frame, rect, params.get('color_sensitive', False))
+        entry = self._entries.get(key)
+        if (entry is not None and entry[0].shape == signature.shape
+                and int(np.abs(entry[0] - signature).max()) <= self.tolerance):
+            self.hits += 1
+            # 返回副本，调用方修改结果不会影响缓存
+            return True, replace(entry[1]) if entry[1] is not None else None, None
+        self.misses += 1
+        return False, None, (key, signature)
+
+    def store(self, token, result: Optional[MatchResult]):
+        """写回匹配结果，token为lookup返回的标记"""
+        if token is None:
+            return
+        if result is not None:
+            result.name = token[0][0]
+            result = replace(result)
+        self._entries[token[0]] = (token[1], result)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+
+def _frame_image(img: Union[np.ndarray, FrameContext]) -> np.ndarray:
+    """从截图或FrameContext中取出原图"""
+    return img.img if isinstance(img, FrameContext) else img
+
+
+def _unpack_template(template_info: Union[PreparedTemplate, List[Any]]):
+    """将模板信息统一解析为(名称, 模板, 匹配参数)，格式错误时返回None"""
+    if isinstance(template_info, PreparedTemplate):
+        return template_info.name, template_info, template_info.params
+    if len(template_info) != 3:
+        return None
+    return template_info
+
+
+def _run_match(img: Union[np.ndarray, FrameContext], template: Union[np.ndarray, PreparedTemplate], params: Dict[str, Any]):
+    """根据匹配参数调用FeatureMatch或TemplateMatch"""
+    # 复制参数字典，不修改原始字典
+    match_params = params.copy()
+    method = match_params.pop('method')
+    
+    if method == "Feature":
+        match_func = FeatureMatch
+    elif method == "Template":
+        match_func = TemplateMatch
+    else:
+        return None
+    if not _match_listeners:
+        return match_func(img, template, **match_params)
+    # 有监听器时按模板统计耗时
+    t_begin = time.perf_counter()
+    result = match_func(img, template, **match_params)
+    _notify_match(f"{method}Match", template, result, time.perf_counter() - t_begin)
+    return result
+
+# 并行匹配线程池（所有MultiMatch共享）
+_match_pool = None
+_match_pool_lock = threading.Lock()
+# 并行匹配默认线程数上限
+MATCH_WORKERS_DEFAULT = 4
+
+
+def _pool_workers(workers: Optional[int] = None) -> int:
+    """线程池大小，None表示 min(MATCH_WORKERS_DEFAULT, CPU核数)"""
+    return max(1, min(workers or MATCH_WORKERS_DEFAULT, os.cpu_count() or 1))
+
+
+def set_match_workers(workers: Optional[int] = None, limit_opencv_threads: bool = False) -> int:
+    """设置MultiMatch并行模式的线程池大小
+    
+    cv2.matchTemplate执行时会释放GIL，可以多线程并行；但OpenCV内部也有自己的线程池，两层线程可能超订。
+    OpenCV线程数是进程级设置，会影响所有OpenCV调用，只在limit_opencv_threads为True时修改。
+    
+    参数:
+        workers: 线程数，None表示 min(MATCH_WORKERS_DEFAULT, CPU核数)
+        limit_opencv_threads: 是否同时把OpenCV内部线程数调整为 CPU核数 // 线程池大小
+        
+    返回:
+        实际使用的线程数
+    """
+    global _match_pool
+    cpu_count = os.cpu_count() or 1
+    workers = _pool_workers(workers)
+    with _match_pool_lock:
+        old_pool = _match_pool
+        _match_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MultiMatch")
+        if limit_opencv_threads:
+            cv2.setNumThreads(max(1, cpu_count // workers))
+    # 提交都在锁内完成，换下的线程池不会再收到新任务，已提交的任务继续执行完
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+    return workers
+
+
+def _submit_to_pool(jobs: List[Optional[Tuple[Any, ...]]], frame: FrameContext) -> List[Optional[Future]]:
+    """在锁内把匹配任务提交到共享线程池，首次使用时按默认配置创建线程池（不修改OpenCV线程数）"""
+    global _match_pool
+    with _match_pool_lock:
+        if _match_pool is None:
+            _match_pool = ThreadPoolExecutor(max_workers=_pool_workers(), thread_name_prefix="MultiMatch")
+        return [_match_pool.submit(_run_match, frame, job[1], job[2]) if job is not None else None for job in jobs]
+
+
+def _submit_matches(frame: FrameContext, templates: List[Union[PreparedTemplate, List[Any]]],
+                    probes: Optional[List[Any]] = None) -> List[Optional[Future]]:
+    """把所有有效模板提交到线程池，返回与templates一一对应的Future列表（无效或命中缓存的模板为None）"""
+    jobs = []
+    for i, template_info in enumerate(templates):
+        unpacked = _unpack_template(template_info)
+        if unpacked is None or unpacked[1] is None or not isinstance(unpacked[2], dict) or 'method' not in unpacked[2]:
+            jobs.append(None)
+            continue
+        if probes is not None and probes[i] is not None and probes[i][0]:
+            jobs.append(None)
+            continue
+        params = unpacked[2]
+        # 提交前先在当前线程完成灰度化，避免多个线程重复转换同一截图
+        if params['method'] == "Template":
+            frame.roi_gray(frame.clip_region(params.get('region')))
+        jobs.append(unpacked)
+    return _submit_to_pool(jobs, frame)
+
+
+def _cancel_matches(futures: Optional[List[Optional[Future]]], start: int = 0):
+    """取消尚未开始的匹配任务"""
+    if futures is None:
+        return
+    for future in futures[start:]:
+        if future is not None:
+            future.cancel()
+
+
+# 匹配监听器，匹配完成后调用 listener(kind, templates, result, elapsed)，用于录制和性能统计
+# kind为"SingleMatch"/"MultiMatch"时templates为调用参数；
+# kind为"TemplateMatch"/"FeatureMatch"时为单个模板（PreparedTemplate或np.ndarray），可能在线程池中调用
+# elapsed为耗时（秒）
+_match_listeners = []
+
+
+def add_match_listener(listener):
+    """注册匹配监听器"""
+    if listener not in _match_listeners:
+        _match_listeners.append(listener)
+
+
+def remove_match_listener(listener):
+    """移除匹配监听器"""
+    if listener in _match_listeners:
+        _match_listeners.remove(listener)
+
+
+def _notify_match(kind: str, templates: Any, result: Any, elapsed: float):
+    """通知所有匹配监听器"""
+    for listener in list(_match_listeners):
+        try:
+            listener(kind, templates, result, elapsed)
+        except Exception as e:
+            print(f"匹配监听器出错: {e}")
+
+
+def _observed(kind: str):
+    """匹配函数装饰器：有监听器时统计耗时并通知监听器，没有监听器时直接调用"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(img, templates, *args, **kwargs):
+            if not _match_listeners:
+                return func(img, templates, *args, **kwargs)
+            t_begin = time.perf_counter()
+            result = func(img, templates, *args, **kwargs)
+            _notify_match(kind, templates, result, time.perf_counter() - t_begin)
+            return result
+        return wrapper
+    return decorator
+
+
 # 单图像匹配
-def SingleMatch(img: np.ndarray, template_info: List[Any]) -> Optional[MatchResult]:
+@_observed("SingleMatch")
+def SingleMatch(img: Union[np.ndarray, FrameContext], template_info: Union[PreparedTemplate, List[Any]],
+                cache: Optional[MatchCache] = None) -> Optional[MatchResult]:
     """单图像匹配函数
     
     参数:
-        img: 输入图像
-        template_info: 单个模板信息，格式为：[图像名称, np.ndarray, 匹配参数]
+        img: 输入图像或FrameContext对象
+        template_info: 单个模板信息，PreparedTemplate对象或列表：[图像名称, np.ndarray, 匹配参数]
                        
                        匹配参数是一个字典: {
                            'method': "Feature"或"Template",
                            ... 其他参数对应FeatureMatch或TemplateMatch的参数
                        }
+        cache: 匹配结果缓存，ROI画面未变化时直接返回上次的结果
     
     返回:
         匹配成功时返回MatchResult对象（包含name字段），失败时返回None
     """
     # 校验输入格式
-    if len(template_info) != 3:
+    unpacked = _unpack_template(template_info)
+    if unpacked is None:
         return None
         
-    name, template_img, params = template_info
+    name, template_img, params = unpacked
     
     # 检查参数有效性
     if not isinstance(params, dict) or 'method' not in params:
@@ -66,18 +494,19 @@ def SingleMatch(img: np.ndarray, template_info: List[Any]) -> Optional[MatchResu
         
     if template_img is None:
         return None
-        
-    # 复制参数字典，不修改原始字典
-    match_params = params.copy()
-    method = match_params.pop('method')
     
-    # 根据匹配方法调用相应函数
-    if method == "Feature":
-        result = FeatureMatch(img, template_img, **match_params)
-    elif method == "Template":
-        result = TemplateMatch(img, template_img, **match_params)
-    else:
-        result = None
+    # 画面未变化时直接使用缓存结果
+    probe = None
+    if cache is not None:
+        if not isinstance(img, FrameContext):
+            img = FrameContext(img)
+        probe = cache.lookup(img, template_info)
+        if probe is not None and probe[0]:
+            return probe[1]
+        
+    result = _run_match(img, template_img, params)
+    if probe is not None:
+        cache.store(probe[2], result)
     
     # 如果找到匹配，添加名称并返回结果
     if result is not None:
@@ -87,12 +516,15 @@ def SingleMatch(img: np.ndarray, template_info: List[Any]) -> Optional[MatchResu
 
 
 # 多图像匹配
-def MultiMatch(img: np.ndarray, templates: List[List[Any]], return_all: bool = True) -> Union[MatchResultContainer, Optional[MatchResult]]:
+@_observed("MultiMatch")
+def MultiMatch(img: Union[np.ndarray, FrameContext], templates: List[Union[PreparedTemplate, List[Any]]], return_all: bool = True,
+               first_found: bool = False, parallel: bool = False,
+               cache: Optional[MatchCache] = None) -> Union[MatchResultContainer, Optional[MatchResult]]:
     """一次性识别多张图像
     
     参数:
-        img: 输入图像
-        templates: 模板信息，格式为列表: [[图像名称, np.ndarray, 匹配参数], ...]
+        img: 输入图像或FrameContext对象
+        templates: 模板信息列表，每项为PreparedTemplate对象或列表: [[图像名称, np.ndarray, 匹配参数], ...]
                    
                    匹配参数是一个字典: {
                        'method': "Feature"或"Template",
@@ -102,6 +534,15 @@ def MultiMatch(img: np.ndarray, templates: List[List[Any]], return_all: bool = T
                     - True: 返回MatchResultContainer对象，包含所有模板的匹配结果
                     - False: 一旦有一个模板匹配成功，立即返回该MatchResult对象，
                              如果所有模板都未匹配成功，则返回None
+        first_found: 按模板顺序短路匹配，默认为False
+                     为True时第一个匹配成功的模板之后的模板不再执行，
+                     仍返回MatchResultContainer，跳过的模板结果为None，
+                     已执行和跳过的模板名称分别记录在container.evaluated和container.skipped中。
+                     适用于 if/elif 优先级判断链，模板应按优先级排序
+        parallel: 是否使用共享线程池并行匹配所有模板，默认为False
+                  结果顺序与串行一致；与first_found同时使用时，命中后取消尚未开始的模板。
+                  线程池大小见set_match_workers
+        cache: 匹配结果缓存，ROI画面未变化的模板直接使用上次的结果，不再匹配
     
     返回:
         如果return_all为True，返回MatchResultContainer对象，可通过.图像名称访问结果
@@ -109,12 +550,25 @@ def MultiMatch(img: np.ndarray, templates: List[List[Any]], return_all: bool = T
     """
     result_container = MatchResultContainer()
     
+    # 所有模板共享同一份截图预处理结果
+    if not isinstance(img, FrameContext):
+        img = FrameContext(img)
+    
+    # 并行模式：先查询缓存，把未命中的模板提交到线程池，再按顺序收集结果
+    probes = None
+    futures = None
+    if parallel:
+        if cache is not None:
+            probes = [cache.lookup(img, template_info) for template_info in templates]
+        futures = _submit_matches(img, templates, probes)
+    
     # 处理每个模板
-    for template_info in templates:
-        if len(template_info) != 3:
+    for i, template_info in enumerate(templates):
+        unpacked = _unpack_template(template_info)
+        if unpacked is None:
             continue
             
-        name, template_img, params = template_info
+        name, template_img, params = unpacked
         
         if not isinstance(params, dict) or 'method' not in params:
             result_container.add_result(name, None)
@@ -124,25 +578,38 @@ def MultiMatch(img: np.ndarray, templates: List[List[Any]], return_all: bool = T
             result_container.add_result(name, None)
             continue
             
-        # 复制参数字典，不修改原始字典
-        match_params = params.copy()
-        method = match_params.pop('method')
-        
-        # 根据匹配方法调用相应函数
-        if method == "Feature":
-            result = FeatureMatch(img, template_img, **match_params)
-        elif method == "Template":
-            result = TemplateMatch(img, template_img, **match_params)
+        # 画面变化检测：ROI未变化的模板直接使用缓存结果。
+        # 串行模式下逐个查询，短路后的模板不再计算签名
+        if probes is not None:
+            probe = probes[i]
+        elif cache is not None:
+            probe = cache.lookup(img, template_info)
         else:
-            result = None
+            probe = None
+        if probe is not None and probe[0]:
+            result = probe[1]
+        else:
+            result = futures[i].result() if futures is not None else _run_match(img, template_img, params)
+            if probe is not None:
+                cache.store(probe[2], result)
         
         # 如果不需要返回所有结果且找到了匹配
         if not return_all and result is not None:
+            _cancel_matches(futures, i + 1)
             # 为结果添加名称
             result.name = name
             return result
             
         result_container.add_result(name, result)
+        
+        # 短路模式：命中后记录剩余模板为跳过
+        if first_found and result is not None:
+            _cancel_matches(futures, i + 1)
+            for rest in templates[i + 1:]:
+                rest_unpacked = _unpack_template(rest)
+                if rest_unpacked is not None:
+                    result_container.add_skipped(rest_unpacked[0])
+            break
     
     # 如果需要返回所有结果，返回容器
     if return_all:
@@ -152,17 +619,68 @@ def MultiMatch(img: np.ndarray, templates: List[List[Any]], return_all: bool = T
     return None
 
 
+# 特征检测器构造函数
+_DETECTOR_FACTORIES = {
+    "SIFT": lambda: cv2.SIFT_create(),
+    "KAZE": lambda: cv2.KAZE_create(),
+    "AKAZE": lambda: cv2.AKAZE_create(),
+    "BRISK": lambda: cv2.BRISK_create(),
+    "ORB": lambda: cv2.ORB_create(),
+}
+# 使用浮点描述符(NORM_L2)的检测器，其余使用二进制描述符(NORM_HAMMING)
+_FLOAT_DESCRIPTORS = ("SIFT", "KAZE")
+# OpenCV的检测器/匹配器对象不保证线程安全，按线程缓存
+_feature_local = threading.local()
+
+
+def _get_detector(detector: str):
+    """获取当前线程缓存的特征检测器"""
+    detectors = getattr(_feature_local, 'detectors', None)
+    if detectors is None:
+        detectors = _feature_local.detectors = {}
+    feature_detector = detectors.get(detector)
+    if feature_detector is None:
+        feature_detector = detectors[detector] = _DETECTOR_FACTORIES[detector]()
+    return feature_detector
+
+
+def _get_matcher(detector: str, matcher: str):
+    """获取当前线程缓存的特征匹配器，FLANN只用于浮点描述符"""
+    if matcher == "FLANN" and detector in _FLOAT_DESCRIPTORS:
+        key = "FLANN"
+    elif detector in _FLOAT_DESCRIPTORS:
+        key = "BF_L2"
+    else:
+        key = "BF_HAMMING"
+    matchers = getattr(_feature_local, 'matchers', None)
+    if matchers is None:
+        matchers = _feature_local.matchers = {}
+    feature_matcher = matchers.get(key)
+    if feature_matcher is None:
+        if key == "FLANN":
+            # KD树索引(algorithm=1)
+            feature_matcher = cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=50))
+        elif key == "BF_L2":
+            # SIFT和KAZE使用NORM_L2
+            feature_matcher = cv2.BFMatcher_create(cv2.NORM_L2)
+        else:
+            # ORB, AKAZE和BRISK使用NORM_HAMMING
+            feature_matcher = cv2.BFMatcher_create(cv2.NORM_HAMMING)
+        matchers[key] = feature_matcher
+    return feature_matcher
+
+
 # 特征匹配
-def FeatureMatch(img: np.ndarray, template: np.ndarray,
+def FeatureMatch(img: Union[np.ndarray, FrameContext], template: Union[np.ndarray, PreparedTemplate],
                 region: Optional[List[int]] = None, count: int = 8,
                 order_by: str = "Horizontal", index: int = 0,
                 green_mask: bool = False, detector: str = "SIFT",
-                ratio: float = 0.7) -> Optional[MatchResult]:
+                ratio: float = 0.7, matcher: str = "BF") -> Optional[MatchResult]:
     """特征匹配函数
     
     参数:
         img: 输入图像
-        template: 模板图像
+        template: 模板图像或PreparedTemplate对象
         region: 感兴趣区域 [x, y, w, h]
         count: 匹配所需的最小特征点数量
         order_by: 结果排序方式 "Horizontal"|"Vertical"|"Score"|"Area"|"Random"
@@ -170,10 +688,18 @@ def FeatureMatch(img: np.ndarray, template: np.ndarray,
         green_mask: 是否使用绿色掩码排除模板中的绿色部分
         detector: 特征检测器类型 "SIFT"|"ORB"|"KAZE"|"AKAZE"|"BRISK"
         ratio: 特征匹配距离比率阈值
+        matcher: 特征匹配器 "BF"|"FLANN"，FLANN只对SIFT/KAZE生效，其余检测器始终使用BF
+        
+    PreparedTemplate的特征点和描述符只计算一次并缓存；检测器和匹配器按线程缓存复用。
         
     返回:
         MatchResult对象或None
     """
+    img = _frame_image(img)
+    prepared = template if isinstance(template, PreparedTemplate) else None
+    if prepared is not None:
+        template = prepared.img
+    
     # 1. 提取ROI区域
     roi_x, roi_y, roi_w, roi_h = (0, 0, img.shape[1], img.shape[0])
     if region is not None:
@@ -191,19 +717,11 @@ def FeatureMatch(img: np.ndarray, template: np.ndarray,
     if roi_image.size == 0 or roi_w <= 0 or roi_h <= 0:
         return None
     
-    # 3. 配置特征检测器
-    detector_map = {
-        "SIFT": cv2.SIFT_create(),
-        "KAZE": cv2.KAZE_create(),
-        "AKAZE": cv2.AKAZE_create(),
-        "BRISK": cv2.BRISK_create(),
-        "ORB": cv2.ORB_create()
-    }
-    
-    if detector not in detector_map:
+    # 3. 获取特征检测器（按线程缓存）
+    if detector not in _DETECTOR_FACTORIES:
         detector = "SIFT"  # 默认使用SIFT
     
-    feature_detector = detector_map[detector]
+    feature_detector = _get_detector(detector)
     
     # 4. 处理绿色掩码
     mask = None
@@ -219,28 +737,25 @@ def FeatureMatch(img: np.ndarray, template: np.ndarray,
     if des1 is None or len(kp1) < 2:
         return None
     
-    # 检测模板的特征点和描述符
-    kp2, des2 = feature_detector.detectAndCompute(template, None)
+    # 模板的特征点和描述符（PreparedTemplate已缓存）
+    if prepared is not None:
+        kp2_pts, des2 = prepared.get_features(detector)
+    else:
+        kp2, des2 = feature_detector.detectAndCompute(template, None)
+        kp2_pts = cv2.KeyPoint_convert(kp2) if kp2 else None
     
-    if des2 is None or len(kp2) < 2:
+    if des2 is None or kp2_pts is None or len(kp2_pts) < 2:
         return None
     
     # 特征匹配
     try:
-        if detector in ["SIFT", "KAZE"]:
-            # SIFT和KAZE使用NORM_L2
-            bf = cv2.BFMatcher_create(cv2.NORM_L2)
-        else:
-            # ORB, AKAZE和BRISK使用NORM_HAMMING
-            bf = cv2.BFMatcher_create(cv2.NORM_HAMMING)
-        
-        matches = bf.knnMatch(des1, des2, k=2)
+        matches = _get_matcher(detector, matcher).knnMatch(des1, des2, k=2)
         
-        # 应用比率测试
+        # 应用比率测试（FLANN可能返回不足2个近邻，直接跳过）
         good_matches = []
-        for m, n in matches:
-            if m.distance < ratio * n.distance:
-                good_matches.append(m)
+        for pair in matches:
+            if len(pair) == 2 and pair[0].distance < ratio * pair[1].distance:
+                good_matches.append(pair[0])
     except Exception as e:
         # 特征匹配失败时，记录错误并返回None
         print(f"特征匹配失败: {e}")
@@ -250,8 +765,9 @@ def FeatureMatch(img: np.ndarray, template: np.ndarray,
         return None
     
     # 获取匹配点坐标
-    src_pts = np.float32([kp1[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-    dst_pts = np.float32([kp2[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+    kp1_pts = cv2.KeyPoint_convert(kp1)
+    src_pts = kp1_pts[[m.queryIdx for m in good_matches]].reshape(-1, 1, 2)
+    dst_pts = kp2_pts[[m.trainIdx for m in good_matches]].reshape(-1, 1, 2)
     
     # 计算单应性矩阵
     H, _ = cv2.findHomography(dst_pts, src_pts, cv2.RANSAC, 5.0)
@@ -326,7 +842,7 @@ def FeatureMatch(img: np.ndarray, template: np.ndarray,
 
 
 # 模板匹配
-def TemplateMatch(img: np.ndarray, template: np.ndarray,
+def TemplateMatch(img: Union[np.ndarray, FrameContext], template: Union[np.ndarray, PreparedTemplate],
                 region: Optional[List[int]] = None, match_threshold: float = 0.7, 
                 method: int = 5, color_sensitive: bool = False, 
                 order_by: str = "Horizontal", index: int = 0, 
@@ -335,7 +851,7 @@ def TemplateMatch(img: np.ndarray, template: np.ndarray,
     
     参数:
         img: 输入图像
-        template: 模板图像
+        template: 模板图像或PreparedTemplate对象（预先计算好灰度图和掩码）
         region: 感兴趣区域 [x, y, w, h]
         match_threshold: 匹配阈值
         method: 匹配方法
@@ -347,7 +863,10 @@ def TemplateMatch(img: np.ndarray, template: np.ndarray,
     返回:
         MatchResult对象或None，如果index=-1则返回MatchResult列表
     """
-    # 1. 提取ROI区域
+    # 1. 提取ROI区域（FrameContext会复用同一截图的灰度化结果）
+    frame = img if isinstance(img, FrameContext) else None
+    if frame is not None:
+        img = frame.img
     roi_x, roi_y, roi_w, roi_h = (0, 0, img.shape[1], img.shape[0])
     if region is not None:
         roi_x, roi_y, roi_w, roi_h = region
@@ -361,82 +880,41 @@ def TemplateMatch(img: np.ndarray, template: np.ndarray,
     # 裁剪ROI区域
     roi = img[roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
     
-    # 2. 处理绿色掩码
-    mask = None
-    if template.shape[2] == 4:
-        alpha = template[:, :, 3]
-        _, mask = cv2.threshold(alpha, 127, 1, cv2.THRESH_BINARY)
-    elif green_mask:
-        mask = np.ones(template.shape[:2], dtype=np.uint8) * 255
-        if len(template.shape) == 3:
-            green_pixels = np.all(template == [0, 255, 0], axis=2)
-            mask[green_pixels] = 0
+    # 2. 获取模板的灰度图和掩码（PreparedTemplate已预先计算）
+    if not isinstance(template, PreparedTemplate):
+        template = PreparedTemplate("", template, {'green_mask': green_mask})
+    mask = template.get_mask(green_mask)
+    template_gray = template.gray
     
-    # 3. 对图像和模板进行灰度化
-    roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if len(roi.shape) == 3 else roi
-    template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY) if len(template.shape) == 3 else template
+    # 3. 对图像进行灰度化
+    if frame is not None:
+        roi_gray = frame.roi_gray((roi_x, roi_y, roi_w, roi_h))
+    else:
+        roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if len(roi.shape) == 3 else roi
 
     # 4. 执行模板匹配
     res = cv2.matchTemplate(roi_gray, template_gray, method, mask=mask) if mask is not None else cv2.matchTemplate(roi_gray, template_gray, method)
 
-    # 5. 查找匹配位置 - 排除inf值
-    valid_mask = ~np.isinf(res)
-    res_valid = np.where(valid_mask, res, -np.inf)  # 将inf值替换为-inf，确保不会被选中
-    loc = np.where(res_valid >= match_threshold)
-    points = list(zip(*loc[::-1]))
-    
-    # 6. 处理匹配结果
-    matches = []
-    for pt in points:
-        # 原始ROI中的相对坐标
-        rx, ry = pt[0], pt[1]
-        
-        # 再次检查，确保分数不是inf
-        if np.isinf(res[ry, rx]):
-            continue
-        
-        # 如果需要颜色敏感匹配
-        if color_sensitive:
-            # 获取匹配区域的图像 - 使用ROI内的相对坐标
-            if (ry + template.shape[0] <= roi.shape[0] and 
-                rx + template.shape[1] <= roi.shape[1]):
-                sub_roi = roi[ry:ry + template.shape[0], rx:rx + template.shape[1]]
-                if sub_roi.shape[:2] != template.shape[:2]:
-                    continue
-                    
-                # 如果模板有Alpha通道，则转换为BGR以进行颜色比较
-                template_to_compare = template
-                if len(template.shape) == 3 and template.shape[2] == 4:
-                    template_to_compare = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-                    
-                # 确保转换后形状仍然匹配
-                if sub_roi.shape != template_to_compare.shape:
-                    continue
-
-                # 计算颜色差异
-                color_diff = np.mean(np.abs(sub_roi.astype(np.float32) - template_to_compare.astype(np.float32)))
-                if color_diff > 30:  # 颜色差异阈值，可以根据需要调整
-                    continue
-            else:
-                continue
-        
-        # 转换为原图坐标系
-        x = rx + roi_x
-        y = ry + roi_y
-        
-        # 计算匹配分数
-        score = round(float(res[ry, rx]), 2)
-        
-        # 创建MatchResult对象
-        match_result = MatchResult(
-            rect=(x, y, template.shape[1], template.shape[0]),
-            score=score,
+    # 5. 查找匹配位置 - 排除inf值，只保留超过阈值的局部最大值
+    th, tw = template.shape[:2]
+    peak_x, peak_y, peak_scores = _find_peaks(res, match_threshold)
+    
+    # 6. 非极大值抑制，同一目标只保留分数最高的位置
+    keep = _nms(peak_x, peak_y, peak_scores, tw, th)
+    
+    # 颜色敏感匹配只对保留下来的结果进行
+    if color_sensitive:
+        keep = [i for i in keep if _color_match(roi, template, peak_x[i], peak_y[i])]
+    
+    matches = [
+        MatchResult(
+            # 转换为原图坐标系
+            rect=(int(peak_x[i]) + roi_x, int(peak_y[i]) + roi_y, tw, th),
+            score=round(float(peak_scores[i]), 2),
             count=1
         )
-        
-        # 避免重复结果
-        if not any(np.allclose((r.rect[0], r.rect[1]), (match_result.rect[0], match_result.rect[1])) for r in matches):
-            matches.append(match_result)
+        for i in keep
+    ]
 
     # 7. 根据order_by排序
     if order_by == "Score":
@@ -479,12 +957,67 @@ def TemplateMatch(img: np.ndarray, template: np.ndarray,
 
 
 
+# 非极大值抑制的IoU阈值，超过该值视为同一目标
+NMS_IOU_THRESHOLD = 0.3
+# 颜色敏感匹配的平均颜色差异阈值
+COLOR_DIFF_THRESHOLD = 30
+
+
+def _find_peaks(res: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """提取匹配结果中超过阈值的局部最大值
+    
+    返回:
+        (x坐标数组, y坐标数组, 分数数组)，坐标为ROI内的相对坐标
+    """
+    # 将inf/nan替换为-inf，确保不会被选中
+    invalid = ~np.isfinite(res)
+    if invalid.any():
+        res = res.copy()
+        res[invalid] = -np.inf
+    # 3x3邻域内的最大值
+    local_max = cv2.dilate(res, None)
+    peak_y, peak_x = np.nonzero((res >= threshold) & (res >= local_max))
+    return peak_x, peak_y, res[peak_y, peak_x]
+
+
+def _nms(xs: np.ndarray, ys: np.ndarray, scores: np.ndarray, w: int, h: int,
+         iou_threshold: float = NMS_IOU_THRESHOLD) -> List[int]:
+    """对同尺寸的候选框进行非极大值抑制，返回保留的下标（按分数从高到低）"""
+    if len(scores) == 0:
+        return []
+    order = np.argsort(-scores, kind='stable')
+    xs = xs[order].astype(np.int64)
+    ys = ys[order].astype(np.int64)
+    area = w * h
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(int(order[i]))
+        # 同尺寸框的交集只取决于坐标差
+        inter = np.maximum(0, w - np.abs(xs[i + 1:] - xs[i])) * np.maximum(0, h - np.abs(ys[i + 1:] - ys[i]))
+        suppressed[i + 1:] |= inter > iou_threshold * (2 * area - inter)
+    return keep
+
+
+def _color_match(roi: np.ndarray, template: PreparedTemplate, rx: int, ry: int) -> bool:
+    """颜色敏感检查：比较匹配位置的图像与模板的平均颜色差异"""
+    th, tw = template.shape[:2]
+    sub_roi = roi[ry:ry + th, rx:rx + tw]
+    # 模板的BGR浮点图已预先转换，确保形状匹配
+    if sub_roi.shape != template.color.shape:
+        return False
+    color_diff = np.mean(np.abs(sub_roi.astype(np.float32) - template.color))
+    return color_diff <= COLOR_DIFF_THRESHOLD
+
+
 # 比较颜色-单/多点
-def CompareColor(img: np.ndarray, pois: Union[List[int], List[List[int]]], color: str) -> bool:
+def CompareColor(img: Union[np.ndarray, FrameContext], pois: Union[List[int], List[List[int]]], color: str) -> bool:
     """比较图像中一个或多个点的颜色是否与指定颜色（及偏色）匹配
 
     参数:
-        img: 输入图像 (np.ndarray)
+        img: 输入图像 (np.ndarray) 或FrameContext对象
         pois: 单个坐标 [x, y] 或坐标列表 [[x1, y1], [x2, y2], ...]
         color: 十六进制颜色字符串，格式为 "RRGGBB-TolTolTol"，例如 "ffd900-101010"。
                - TolTolTol 是BGR三个通道的容差值（同样为十六进制）。
@@ -493,6 +1026,7 @@ def CompareColor(img: np.ndarray, pois: Union[List[int], List[List[int]]], color
     返回:
         如果所有点的颜色都匹配，则返回 True，否则返回 False。
     """
+    img = _frame_image(img)
     try:
         if '-' in color:
             main_color_hex, tolerance_hex = color.split('-')
@@ -541,11 +1075,11 @@ def CompareColor(img: np.ndarray, pois: Union[List[int], List[List[int]]], color
 
 
 # 获取hsv
-def GetHsv(img: np.ndarray, pois: Union[List[int], List[List[int]]]) -> Union[List[int], List[List[int]], None]:
+def GetHsv(img: Union[np.ndarray, FrameContext], pois: Union[List[int], List[List[int]]]) -> Union[List[int], List[List[int]], None]:
     """获取图像中一个或多个点的HSV值。
 
     参数:
-        img: 输入图像 (np.ndarray, BGR格式)
+        img: 输入图像 (np.ndarray, BGR格式) 或FrameContext对象（复用已转换的HSV图）
         pois: 单个坐标 [x, y] 或坐标列表 [[x1, y1], [x2, y2], ...]
 
     返回:
@@ -573,7 +1107,7 @@ def GetHsv(img: np.ndarray, pois: Union[List[int], List[List[int]]]) -> Union[Li
             return None  # 坐标格式不正确
 
     # 将整个图像转换为HSV色彩空间以提高效率
-    hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hsv_img = img.hsv if isinstance(img, FrameContext) else cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
 
     hsv_values = []
     for point in points:
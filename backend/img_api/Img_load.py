@@ -1,40 +1,171 @@
 import json
 import base64
+import threading
 import numpy as np
 import cv2
 from cryptography.fernet import Fernet
+from .Cv import PreparedTemplate
+
+
+class _TemplateStore:
+    """
+    进程级模板仓库
+    
+    每个(dll_path, key)只解密一次，图像在首次访问时才解码，
+    解码后的图像及其灰度图、alpha通道、alpha掩码会被缓存，所有ImageLoader共享。
+    缓存的数组均为只读，避免某个调用方意外修改共享数据。
+    """
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, dll_path, key):
+        """获取(dll_path, key)对应的共享仓库，上次加载失败时创建新仓库重新加载"""
+        with cls._stores_lock:
+            store = cls._stores.get((dll_path, key))
+            if store is None or store.load_failed:
+                store = cls(dll_path, key)
+                cls._stores[(dll_path, key)] = store
+            return store
+
+    def __init__(self, dll_path, key):
+        self.dll_path = dll_path
+        self.key = key
+        self._lock = threading.RLock()
+        self._encoded = None    # 图像名称 -> base64字符串，解码后即删除
+        self._images = {}       # 图像名称 -> 解码后的缓存项
+        self._loaded = False
+        self.load_failed = False    # 读取或解密失败，下一个ImageLoader会重新加载
+
+    def _ensure_loaded(self):
+        """加载并解密DLL文件中的图像数据（只执行一次）"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                # 读取加密的DLL文件
+                with open(self.dll_path, "rb") as f:
+                    encrypted_data = f.read()
+                
+                # 解密数据
+                fernet = Fernet(self.key)
+                decrypted_data = fernet.decrypt(encrypted_data)
+                
+                # 解析JSON数据
+                self._encoded = json.loads(decrypted_data.decode('utf-8'))
+                
+                print(f"成功加载了 {len(self._encoded)} 个图像")
+            except Exception as e:
+                self._encoded = {}
+                self.load_failed = True
+                print(f"加载图像时出错: {str(e)}")
+            self._loaded = True
+
+    def names(self):
+        """所有可用的图像名称"""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._images.keys()) + [name for name in self._encoded if name not in self._images]
+
+    def __contains__(self, name):
+        self._ensure_loaded()
+        with self._lock:
+            return name in self._images or name in self._encoded
+
+    def _entry(self, name):
+        """获取缓存项，首次访问时解码图像"""
+        self._ensure_loaded()
+        entry = self._images.get(name)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._images.get(name)
+            if entry is not None:
+                return entry
+            if name not in self._encoded:
+                return None
+            # 从base64解码图像数据
+            img_data = base64.b64decode(self._encoded.pop(name))
+            # 使用OpenCV解码图像
+            img = cv2.imdecode(np.frombuffer(img_data, np.uint8), cv2.IMREAD_UNCHANGED)
+            if img is not None:
+                img.flags.writeable = False
+            entry = {'img': img}
+            self._images[name] = entry
+            return entry
+
+    def _derived(self, name, kind, build):
+        """获取派生图像，首次访问时计算并缓存"""
+        entry = self._entry(name)
+        if entry is None:
+            raise KeyError(name)
+        if kind not in entry:
+            with self._lock:
+                if kind not in entry:
+                    value = build(entry['img']) if entry['img'] is not None else None
+                    if value is not None:
+                        value.flags.writeable = False
+                    entry[kind] = value
+        return entry[kind]
+
+    def image(self, name):
+        """原始图像(BGR或BGRA)"""
+        entry = self._entry(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry['img']
+
+    def gray(self, name):
+        """灰度图像"""
+        return self._derived(name, 'gray', _to_gray)
+
+    def alpha(self, name):
+        """alpha通道，没有alpha通道时为None"""
+        return self._derived(name, 'alpha', _to_alpha)
+
+    def mask(self, name):
+        """由alpha通道阈值化得到的0/1掩码，没有alpha通道时为None"""
+        return self._derived(name, 'mask', _to_alpha_mask)
+
+
+def _to_gray(img):
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def _to_alpha(img):
+    if img.ndim == 3 and img.shape[2] == 4:
+        return np.ascontiguousarray(img[:, :, 3])
+    return None
+
+
+def _to_alpha_mask(img):
+    alpha = _to_alpha(img)
+    if alpha is None:
+        return None
+    _, mask = cv2.threshold(alpha, 127, 1, cv2.THRESH_BINARY)
+    return mask
+
 
 class ImageLoader:
     def __init__(self, dll_path="res/bin/imgs.dll", key="Bh3vgV16NWk-cc91fIqN28d9uY4Vu5Ii72Snv1YgECg="):
         """
         初始化图像加载器
         
+        同一个DLL文件只会在进程内解密一次，多个ImageLoader共享同一份解码缓存
+        
         参数:
             dll_path: 加密DLL文件的路径
             key: 解密密钥
         """
         self.key = key
         self.dll_path = dll_path
-        self.images_data = {}
-        self._load_images()
-    
-    def _load_images(self):
-        """加载并解密DLL文件中的图像数据"""
-        try:
-            # 读取加密的DLL文件
-            with open(self.dll_path, "rb") as f:
-                encrypted_data = f.read()
-            
-            # 解密数据
-            fernet = Fernet(self.key)
-            decrypted_data = fernet.decrypt(encrypted_data)
-            
-            # 解析JSON数据
-            self.images_data = json.loads(decrypted_data.decode('utf-8'))
-            
-            print(f"成功加载了 {len(self.images_data)} 个图像")
-        except Exception as e:
-            print(f"加载图像时出错: {str(e)}")
+        self._store = _TemplateStore.get(dll_path, key)
     
     def __getattr__(self, name):
         """
@@ -44,25 +175,50 @@ class ImageLoader:
             name: 图像名称
         
         返回:
-            numpy.ndarray: 图像数据
+            numpy.ndarray: 图像数据（只读，共享缓存）
         """
-        if name in self.images_data:
-            # 从base64解码图像数据
-            img_data = base64.b64decode(self.images_data[name])
-            
-            # 将二进制数据转换为numpy数组
-            nparr = np.frombuffer(img_data, np.uint8)
-            
-            # 使用OpenCV解码图像
-            img = cv2.imdecode(nparr, cv2.IMREAD_UNCHANGED)
-            
-            return img
-        else:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._store.image(name)
+        except KeyError:
+            raise AttributeError(f"找不到名为 '{name}' 的图像")
+
+    def get_gray(self, name):
+        """获取图像的灰度图（缓存）"""
+        return self._store.gray(name)
+
+    def get_alpha(self, name):
+        """获取图像的alpha通道（缓存），没有alpha通道时返回None"""
+        return self._store.alpha(name)
+
+    def get_mask(self, name):
+        """获取由alpha通道得到的匹配掩码（缓存），没有alpha通道时返回None"""
+        return self._store.mask(name)
+    
+    def prepare(self, name, params):
+        """
+        生成预处理模板，供SingleMatch/MultiMatch直接使用
+        
+        参数:
+            name: 图像名称
+            params: 匹配参数，例如 {'method': 'Template', 'region': [x, y, w, h]}
+        
+        返回:
+            PreparedTemplate: 灰度图和掩码复用仓库缓存
+        """
+        try:
+            img = self._store.image(name)
+        except KeyError:
             raise AttributeError(f"找不到名为 '{name}' 的图像")
+        if img is None:
+            # 解码失败时保持原有的列表格式，匹配函数会直接返回None
+            return [name, None, params]
+        return PreparedTemplate(name, img, params, gray=self._store.gray(name), mask=self._store.mask(name))
     
     def get_image_names(self):
         """获取所有可用的图像名称列表"""
-        return list(self.images_data.keys())
+        return self._store.names()
 
 
 # # 使用示例
@@ -89,4 +245,4 @@ class ImageLoader:
 #             cv2.waitKey(0)
 #             cv2.destroyAllWindows()
 #         except Exception as e:
-#             print(f"加载图像时出错: {str(e)}") 
\ No newline at end of file
+#             print(f"加载图像时出错: {str(e)}") 
\ No newline at end of file
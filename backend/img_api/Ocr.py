@@ -1,27 +1,54 @@
 from rapidocr import RapidOCR, OCRVersion
 import numpy as np
 import re
-from typing import Union, List, Tuple, Any, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Union, List, Tuple, Any, Optional, Dict
+
+# 检测结果缓存的最大条目数
+DETECT_CACHE_SIZE = 32
 
 class Ocr:
     def __init__(self):
         self.engine = RapidOCR(
             params={
-        "Rec.ocr_version": OCRVersion.PPOCRV5
+        "Rec.ocr_version": OCRVersion.PPOCRV5,
+        # 多区域识别时一次推理的最大数量
+        "Rec.rec_batch_num": 16
     }
         )
+        # 检测结果缓存: (内容哈希, 尺寸, 参数) -> 识别结果，按最近使用排序
+        self._detect_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
+    @staticmethod
+    def _crop(img: np.ndarray, region: List[int]) -> Tuple[np.ndarray, int, int]:
+        """裁剪区域，坐标限制在图像范围内，返回裁剪图像和裁剪后的左上角坐标"""
+        x, y, w, h = region
+        
+        # 确保坐标在图像范围内
+        x = max(0, min(x, img.shape[1] - 1))
+        y = max(0, min(y, img.shape[0] - 1))
+        w = min(w, img.shape[1] - x)
+        h = min(h, img.shape[0] - y)
+        
+        return img[y:y+h, x:x+w], x, y
+    
     # 仅文本识别
     def only_text(self, img: np.ndarray, regions: Union[List[int], List[List[int]]]) -> List[Optional[str]]:
         """
         仅进行文本识别，不进行文本检测和方向分类
+        所有区域的裁剪图像一次送入识别模型，由识别模型按宽高比排序、补齐到相同高度后批量推理
         
         Args:
             img: 输入图像，numpy数组格式
             regions: 检测坐标，可以是单个[x,y,w,h]或多个[[x,y,w,h], ...]
             
         Returns:
-            List[Optional[str]]: 识别结果列表，如果某区域无识别结果则为None
+            List[Optional[str]]: 识别结果列表，与regions顺序一致，如果某区域无识别结果则为None
         """
         # 判断regions是否为单个坐标
         if isinstance(regions, list) and len(regions) > 0:
@@ -29,46 +56,52 @@ class Ocr:
                 # 单个坐标情况，转换为列表格式
                 regions = [regions]
         
-        results = []
+        results = [None] * len(regions)
         
-        # 处理每个区域
-        for region in regions:
-            x, y, w, h = region
-            
-            # 确保坐标在图像范围内
-            x = max(0, min(x, img.shape[1] - 1))
-            y = max(0, min(y, img.shape[0] - 1))
-            w = min(w, img.shape[1] - x)
-            h = min(h, img.shape[0] - y)
-            
-            # 裁剪区域
-            crop_img = img[y:y+h, x:x+w]
-            
-            # 如果裁剪区域为空，添加None结果
+        # 裁剪所有区域，空区域保持None结果
+        crops = []
+        indices = []
+        for i, region in enumerate(regions):
+            crop_img, _, _ = self._crop(img, region)
             if crop_img.size == 0:
-                results.append(None)
                 continue
-            
-            # 进行OCR识别，仅使用文本识别，不使用检测和分类
-            ocr_result = self.engine(crop_img, use_det=False, use_cls=False, use_rec=True)
-            
-            # 解析结果
-            if ocr_result and len(ocr_result[0]) > 0:
-                # ocr_result格式为: ([['文本', 置信度]], [耗时])
-                # 取第一个结果的文本并去除特殊符号
-                text = ocr_result[0][0][0]
-                # 使用正则表达式去除特殊符号，只保留中文、英文和数字
-                text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', text)
-                # 结果修正
-                text = text.replace('銀', '')
-                results.append(text)
-            else:
-                results.append(None)
+            crops.append(crop_img)
+            indices.append(i)
+        
+        if not crops:
+            return results
+        
+        # 批量文本识别，不使用检测和分类
+        rec_result = self.engine.get_rec_res(crops)
+        
+        # 按原区域顺序填入结果
+        for i, text in zip(indices, rec_result.txts):
+            if not text:
+                continue
+            # 使用正则表达式去除特殊符号，只保留中文、英文和数字
+            text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', text)
+            # 结果修正
+            text = text.replace('銀', '')
+            results[i] = text
         
         return results
     
-    # 检测+分类+识别 ---- bug，只写了识别第一个区域
-    def detect(self, img: np.ndarray, regions: Union[List[int], List[List[int]]], use_det: bool = True, use_cls: bool = False, use_rec: bool = True) -> List[Optional[str]]:
+    # 检测+分类+识别
+    def detect(self, img: np.ndarray, regions: Union[List[int], List[List[int]]], use_det: bool = True, use_cls: bool = False, use_rec: bool = True) -> Dict[str, List[int]]:
+        """
+        文本检测+识别，处理所有区域
+        相同内容的裁剪图像只识别一次，结果按内容哈希缓存在LRU中，静止的列表面板只需计算一次哈希
+        
+        Args:
+            img: 输入图像，numpy数组格式
+            regions: 检测坐标，可以是单个[x,y,w,h]或多个[[x,y,w,h], ...]
+            use_det: 是否使用文本检测
+            use_cls: 是否使用方向分类
+            use_rec: 是否使用文本识别
+            
+        Returns:
+            Dict[str, List[int]]: 文本: [x,y,w,h]，坐标为整幅图像中的坐标
+        """
         # 判断regions是否为单个坐标
         if isinstance(regions, list) and len(regions) > 0:
             if isinstance(regions[0], int):
@@ -79,30 +112,49 @@ class Ocr:
         
         # 处理每个区域
         for region in regions:
-            x, y, w, h = region
-            
-            # 确保坐标在图像范围内
-            x = max(0, min(x, img.shape[1] - 1))
-            y = max(0, min(y, img.shape[0] - 1))
-            w = min(w, img.shape[1] - x)
-            h = min(h, img.shape[0] - y)
-            
             # 裁剪区域
-            crop_img = img[y:y+h, x:x+w]
+            crop_img, x, y = self._crop(img, region)
             
-            # 如果裁剪区域为空，添加None结果
+            # 如果裁剪区域为空，跳过
             if crop_img.size == 0:
                 continue
             
-            # 进行OCR识别，仅使用文本识别，不使用检测和分类
-            ocr_result = self.engine(crop_img, use_det=use_det, use_cls=use_cls, use_rec=use_rec)
-            for i in range(len(ocr_result.txts)):
-                r_x = int(ocr_result.boxes[i][0][0]+x)
-                r_y = int(ocr_result.boxes[i][0][1]+y)
-                r_w = int(ocr_result.boxes[i][1][0]-ocr_result.boxes[i][0][0])
-                r_h = int(ocr_result.boxes[i][2][1]-ocr_result.boxes[i][0][1])
-                result[ocr_result.txts[i]] = [r_x, r_y, r_w, r_h]
-            return result
-
-            
-        
\ No newline at end of file
+            for text, (r_x, r_y, r_w, r_h) in self._detect_crop(crop_img, use_det, use_cls, use_rec):
+                result[text] = [r_x + x, r_y + y, r_w, r_h]
+        
+        return result
+    
+    def _detect_crop(self, crop_img: np.ndarray, use_det: bool, use_cls: bool, use_rec: bool) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        """识别一张裁剪图像，返回 [(文本, 相对裁剪图像的(x,y,w,h))]，结果按内容哈希缓存"""
+        crop_img = np.ascontiguousarray(crop_img)
+        key = (hashlib.blake2b(crop_img, digest_size=16).digest(), crop_img.shape, use_det, use_cls, use_rec)
+        with self._cache_lock:
+            cached = self._detect_cache.get(key)
+            if cached is not None:
+                self._detect_cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+        
+        ocr_result = self.engine(crop_img, use_det=use_det, use_cls=use_cls, use_rec=use_rec)
+        items = []
+        txts = getattr(ocr_result, 'txts', None) or ()
+        boxes = getattr(ocr_result, 'boxes', None)
+        if boxes is not None:
+            for i in range(len(txts)):
+                r_x = int(boxes[i][0][0])
+                r_y = int(boxes[i][0][1])
+                r_w = int(boxes[i][1][0]-boxes[i][0][0])
+                r_h = int(boxes[i][2][1]-boxes[i][0][1])
+                items.append((txts[i], (r_x, r_y, r_w, r_h)))
+        
+        with self._cache_lock:
+            self._detect_cache[key] = items
+            if len(self._detect_cache) > DETECT_CACHE_SIZE:
+                self._detect_cache.popitem(last=False)
+        return items
+    
+    def clear_cache(self):
+        """清空检测结果缓存"""
+        with self._cache_lock:
+            self._detect_cache.clear()
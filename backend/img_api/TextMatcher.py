@@ -0,0 +1,120 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    字符级编辑距离（Levenshtein）
+    :param limit: 距离一定超过limit时提前返回limit+1
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def default_budget(text: str) -> int:
+    """默认的编辑距离上限：每3个字允许错1个，至少1个"""
+    return max(1, len(text) // 3)
+
+
+class BKTree:
+    """
+    BK树，在固定词典中查找编辑距离最近的词
+
+    用于把OCR结果纠正到已知名称，例如采集物品名称。
+    词典在构建时一次性建树，查询时利用三角不等式剪枝，只和少量词计算编辑距离。
+
+    使用示例：
+    ```python
+    names = BKTree(gather_items)
+    names.nearest('钢矿石')    # 编辑距离上限内唯一最近的名称，没有时返回None
+    ```
+    """
+
+    def __init__(self, words: Iterable[str]):
+        # 节点: [词, {距离: 子节点}]
+        self._root = None
+        self._words = set()
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def add(self, word: str):
+        """添加一个词"""
+        if word in self._words:
+            return
+        self._words.add(word)
+        if self._root is None:
+            self._root = [word, {}]
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                return
+            node = child
+
+    def search(self, text: str, max_distance: int) -> List[Tuple[int, str]]:
+        """查找编辑距离不超过max_distance的所有词，按距离排序"""
+        results = []
+        if self._root is None:
+            return results
+        stack = [self._root]
+        while stack:
+            word, children = stack.pop()
+            distance = edit_distance(text, word)
+            if distance <= max_distance:
+                results.append((distance, word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort()
+        return results
+
+    def nearest(self, text: Optional[str], max_distance: Optional[int] = None) -> Optional[str]:
+        """
+        查找最近的词
+        :param text: OCR识别的文本
+        :param max_distance: 编辑距离上限，默认为default_budget(text)
+        :return: 完全匹配时直接返回；否则返回上限内唯一最近的词，没有或有多个同样近的词时返回None
+        """
+        if not text:
+            return None
+        if text in self._words:
+            return text
+        if max_distance is None:
+            max_distance = default_budget(text)
+        results = self.search(text, max_distance)
+        if not results:
+            return None
+        # 多个词同样近时无法判断，不纠正
+        if len(results) > 1 and results[1][0] == results[0][0]:
+            return None
+        return results[0][1]
+
+    def snap(self, ocr_result: Dict[str, List[int]], max_distance: Optional[int] = None) -> Dict[str, List[int]]:
+        """把Ocr.detect的结果纠正为词典中的词，无法纠正的文本丢弃"""
+        snapped = {}
+        for text, box in ocr_result.items():
+            word = self.nearest(text, max_distance)
+            if word is not None and word not in snapped:
+                snapped[word] = box
+        return snapped
@@ -0,0 +1,142 @@
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# 相位相关响应低于该值时认为位移估计不可靠
+MIN_RESPONSE = 0.1
+# 位移后重叠部分的平均灰度差超过该值时认为画面内容发生了变化
+MAX_OVERLAP_DIFF = 8.0
+# 水平位移超过该值（像素）时认为不是列表滚动
+MAX_DX = 2.0
+# 新露出区域超过面板高度的该比例时直接识别整个面板
+FULL_OCR_RATIO = 0.8
+# 文本框距离边缘不超过该值（像素）时认为文本行被截断
+EDGE_MARGIN = 2
+# 没有识别到文本行时使用的行高（像素）
+DEFAULT_LINE_HEIGHT = 32
+
+
+class ScrollTextTracker:
+    """
+    滚动列表文本跟踪器
+
+    用相位相关估计列表面板在两帧之间的垂直滚动距离，
+    上一帧识别到的文本行按滚动距离平移后沿用，只对新露出的行进行OCR。
+    位移不可靠或画面内容发生变化时自动退回整个面板识别。
+
+    使用示例：
+    ```python
+    tracker = ScrollTextTracker(ocr, [20, 61, 212, 232])
+    lines = tracker.update(cap.screencap())   # 与ocr.detect的返回格式相同
+    ```
+    """
+
+    def __init__(self, ocr: Any, region: List[int]):
+        """
+        :param ocr: Ocr对象，使用其detect方法
+        :param region: 列表面板区域 [x, y, w, h]
+        """
+        self.ocr = ocr
+        self.region = list(region)
+        self.lines: Dict[str, List[int]] = {}
+        self.full_ocr_count = 0          # 整个面板识别的次数
+        self.partial_ocr_count = 0       # 只识别新露出区域的次数
+        self._panel = None
+        self._window = None
+
+    def reset(self):
+        """清空跟踪状态，下一次update识别整个面板"""
+        self.lines = {}
+        self._panel = None
+
+    def _panel_gray(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """裁剪面板并转换为float32灰度图"""
+        x, y, w, h = self.region
+        panel = frame[y:y+h, x:x+w]
+        if panel.shape[0] != h or panel.shape[1] != w:
+            return None
+        if panel.ndim == 3:
+            panel = cv2.cvtColor(panel, cv2.COLOR_BGR2GRAY)
+        return panel.astype(np.float32)
+
+    def _spectrum_input(self, panel: np.ndarray) -> np.ndarray:
+        """去均值、加汉宁窗后在下方补零到两倍高度，避免大位移时循环相关的混叠"""
+        if self._window is None or self._window.shape != panel.shape:
+            self._window = cv2.createHanningWindow((panel.shape[1], panel.shape[0]), cv2.CV_32F)
+        windowed = (panel - float(panel.mean())) * self._window
+        return cv2.copyMakeBorder(windowed, 0, panel.shape[0], 0, 0, cv2.BORDER_CONSTANT, value=0)
+
+    def _estimate_shift(self, panel: np.ndarray) -> Optional[int]:
+        """估计面板内容的垂直位移（向上滚动为负），不可靠时返回None"""
+        (dx, dy), response = cv2.phaseCorrelate(self._spectrum_input(self._panel), self._spectrum_input(panel))
+        if response < MIN_RESPONSE or abs(dx) > MAX_DX:
+            return None
+        dy = int(round(dy))
+        h = panel.shape[0]
+        if abs(dy) >= h:
+            return None
+        # 校验位移后的重叠部分，防止行高周期造成的误判以及列表内容变化
+        if dy <= 0:
+            before, after = self._panel[-dy:], panel[:h+dy]
+        else:
+            before, after = self._panel[:h-dy], panel[dy:]
+        if before.size == 0 or float(cv2.absdiff(before, after).mean()) > MAX_OVERLAP_DIFF:
+            return None
+        return dy
+
+    def _full_ocr(self, frame: np.ndarray) -> Dict[str, List[int]]:
+        self.full_ocr_count += 1
+        return dict(self.ocr.detect(frame, self.region))
+
+    def update(self, frame: np.ndarray) -> Dict[str, List[int]]:
+        """
+        识别当前帧面板中的文本
+        :param frame: 截图
+        :return: 文本: [x, y, w, h]（整幅图像中的坐标），与Ocr.detect相同
+        """
+        panel = self._panel_gray(frame)
+        if panel is None:
+            self.reset()
+            return self.ocr.detect(frame, self.region)
+
+        dy = self._estimate_shift(panel) if self._panel is not None else None
+        self._panel = panel
+        if dy is None:
+            self.lines = self._full_ocr(frame)
+            return dict(self.lines)
+        if dy == 0:
+            return dict(self.lines)
+
+        x, y, w, h = self.region
+        line_height = max((box[3] for box in self.lines.values()), default=DEFAULT_LINE_HEIGHT)
+        # 新露出区域向内扩展两行，被截断的行可以完整识别，文本检测也有足够的上下文
+        strip_h = min(h, abs(dy) + 2 * line_height)
+        if strip_h >= h * FULL_OCR_RATIO:
+            self.lines = self._full_ocr(frame)
+            return dict(self.lines)
+        strip_y = y + h - strip_h if dy < 0 else y
+        # 新识别区域在面板内侧的边界，碰到该边界的文本行不完整
+        inner_edge = strip_y if dy < 0 else strip_y + strip_h
+
+        # 平移上一帧完整的文本行（碰到面板边缘的行可能不完整，丢弃），丢弃移出面板的行
+        lines = {}
+        for text, (bx, by, bw, bh) in self.lines.items():
+            if by <= y + EDGE_MARGIN or by + bh >= y + h - EDGE_MARGIN:
+                continue
+            by += dy
+            if by < y or by + bh > y + h:
+                continue
+            lines[text] = [bx, by, bw, bh]
+
+        # 只添加新露出的文本行：跳过不完整的行和与已有行重叠的行
+        self.partial_ocr_count += 1
+        carried = list(lines.values())
+        for text, (bx, by, bw, bh) in self.ocr.detect(frame, [x, strip_y, w, strip_h]).items():
+            if by <= inner_edge + EDGE_MARGIN and by + bh >= inner_edge - EDGE_MARGIN:
+                continue
+            center = by + bh / 2
+            if any(cy <= center <= cy + ch for _, cy, _, ch in carried):
+                continue
+            lines[text] = [bx, by, bw, bh]
+        self.lines = lines
+        return dict(lines)
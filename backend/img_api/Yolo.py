@@ -4,21 +4,70 @@ import numpy as np
 import time
 import io
 import os
+import atexit
+import shutil
+import hashlib
+import tempfile
+import threading
 from cryptography.fernet import Fernet
+from backend.profiling.Metrics import metrics
+
+# 归一化系数 [0-255] -> [0-1]
+INPUT_SCALE = np.float32(1 / 255.0)
+# 模型名称
+MODEL_NAMES = {'character': '角色', 'skill': '技能', 'talent': '天赋'}
+# 图优化级别
+OPTIMIZATION_LEVELS = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+# 正在写入优化模型的私有临时目录，进程退出时清理
+_work_dirs = set()
+
+
+def _remove_work_dir(path):
+    """删除优化模型的临时目录"""
+    shutil.rmtree(path, ignore_errors=True)
+    _work_dirs.discard(path)
+
+
+@atexit.register
+def _cleanup_work_dirs():
+    for path in list(_work_dirs):
+        _remove_work_dir(path)
+
 
 class YoloDetector:
     """YOLO模型检测器类，支持多模型加载和针对不同目标的检测"""
     
-    def __init__(self, character_model='res/bin/character.dll', skill_model='res/bin/skill.dll', talent_model='res/bin/talent.dll'):
+    def __init__(self, character_model='res/bin/character.dll', skill_model='res/bin/skill.dll', talent_model='res/bin/talent.dll',
+                 profile=False, intra_op_threads=0, inter_op_threads=0, optimization_level='all',
+                 enable_mem_arena=True, cache_dir='res/cache'):
         """
-        初始化YOLO检测器，加载多个模型
+        初始化YOLO检测器，模型在第一次使用时才解密加载
         
         参数:
             character_model: 角色检测模型路径
             skill_model: 技能检测模型路径
             talent_model: 天赋检测模型路径
-            use_cuda: 是否使用CUDA加速
+            profile: 是否统计每次推理的耗时，统计结果记录到运行指标 yolo.<模型类型>
+            intra_op_threads: 单个算子内的线程数，0表示由onnxruntime决定
+            inter_op_threads: 算子间的线程数，0表示由onnxruntime决定
+            optimization_level: 图优化级别，可选 'disable', 'basic', 'extended', 'all'
+            enable_mem_arena: 是否启用CPU内存池
+            cache_dir: 优化后模型的缓存目录（同样加密保存），为None时不缓存
         """
+        if optimization_level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"不支持的优化级别: {optimization_level}，可用级别: {list(OPTIMIZATION_LEVELS.keys())}")
+        self.profile = profile
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.optimization_level = optimization_level
+        self.enable_mem_arena = enable_mem_arena
+        self.cache_dir = cache_dir
         # 设置解密密钥
         self.key = b'Bh3v3pp6NWk-ccty9IqN5I0LuYXPu5IiPVSnWvYgECg='
         self.fernet = Fernet(self.key)
@@ -26,35 +75,71 @@ class YoloDetector:
         # 设置cpu运行
         self.providers = ['CPUExecutionProvider']
         
-        # 加载所有模型
-        print("正在加载并解密模型...")
+        self.model_paths = {
+            'character': character_model,
+            'skill': skill_model,
+            'talent': talent_model,
+        }
+        # 已加载的模型会话和模型信息
         self.models = {}
         self.model_info = {}
+        self._load_lock = threading.Lock()
+        # 每个线程各自的预分配输入张量，见_input_buffer
+        self._buffers = threading.local()
+    
+    def load_models(self, model_types=None):
+        """
+        提前加载模型
         
-        try:
-            # 加载角色模型
-            self.models['character'] = self._load_encrypted_model(character_model)
-            self._init_model_info('character')
-            print(f"角色模型加载成功: {character_model}")
-            
-            # 加载技能模型
-            self.models['skill'] = self._load_encrypted_model(skill_model)
-            self._init_model_info('skill')
-            print(f"技能模型加载成功: {skill_model}")
-            
-            # 加载天赋模型
-            self.models['talent'] = self._load_encrypted_model(talent_model)
-            self._init_model_info('talent')
-            print(f"天赋模型加载成功: {talent_model}")
-            
-        except Exception as e:
-            print(f"模型加载失败: {e}")
-            raise
+        参数:
+            model_types: 要加载的模型类型列表，默认加载全部模型
+        """
+        for model_type in model_types or self.model_paths:
+            self._get_session(model_type)
+    
+    def _get_session(self, model_type):
+        """获取模型会话，第一次使用时解密加载并预热"""
+        # 模型信息最后写入，有模型信息说明会话已经可用
+        if model_type in self.model_info:
+            return self.models[model_type]
+        with self._load_lock:
+            if model_type not in self.model_info:
+                model_path = self.model_paths[model_type]
+                try:
+                    self.models[model_type] = self._load_encrypted_model(model_path)
+                    self._init_model_info(model_type)
+                    self._warmup(model_type)
+                except Exception as e:
+                    self.models.pop(model_type, None)
+                    self.model_info.pop(model_type, None)
+                    print(f"{MODEL_NAMES[model_type]}模型加载失败: {e}")
+                    raise
+                print(f"{MODEL_NAMES[model_type]}模型加载成功: {model_path}")
+        return self.models[model_type]
+    
+    def _session_options(self, optimization_level=None):
+        """根据初始化参数生成会话选项"""
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.enable_cpu_mem_arena = self.enable_mem_arena
+        options.graph_optimization_level = OPTIMIZATION_LEVELS[optimization_level or self.optimization_level]
+        return options
+    
+    def _cache_path(self, model_path, encrypted_data):
+        """优化后模型的缓存路径，模型文件、onnxruntime版本或优化级别变化时缓存自动失效"""
+        digest = hashlib.sha256(encrypted_data)
+        digest.update(f"{ort.__version__}|{self.optimization_level}".encode())
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{digest.hexdigest()[:16]}.opt")
     
     def _load_encrypted_model(self, model_path):
         """
         加载并解密模型
         
+        有缓存时直接加载优化后的模型并跳过图优化；没有缓存时正常优化，
+        并把优化结果加密写入缓存目录
+        
         参数:
             model_path: 加密模型的路径
             
@@ -70,11 +155,40 @@ class YoloDetector:
             with open(model_path, 'rb') as file:
                 encrypted_data = file.read()
             
+            cache_path = None
+            if self.cache_dir and self.optimization_level != 'disable':
+                cache_path = self._cache_path(model_path, encrypted_data)
+                if os.path.exists(cache_path):
+                    try:
+                        with open(cache_path, 'rb') as file:
+                            optimized_data = self.fernet.decrypt(file.read())
+                        return ort.InferenceSession(optimized_data, sess_options=self._session_options('disable'),
+                                                    providers=self.providers)
+                    except Exception as e:
+                        print(f"读取模型缓存 {cache_path} 失败，重新优化: {e}")
+            
             # 解密模型数据
             decrypted_data = self.fernet.decrypt(encrypted_data)
             
-            # 从内存中加载ONNX模型，而不是保存到磁盘
-            session = ort.InferenceSession(decrypted_data, providers=self.providers)
+            # 从内存中加载ONNX模型。onnxruntime只能把优化结果写到文件，
+            # 写到缓存目录下只有当前用户可以访问的临时目录中，加密写入缓存后立即删除
+            options = self._session_options()
+            work_dir = None
+            if cache_path is not None:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    work_dir = tempfile.mkdtemp(prefix='.optimize-', dir=self.cache_dir)
+                    _work_dirs.add(work_dir)
+                    options.optimized_model_filepath = os.path.join(work_dir, 'model.onnx')
+                except OSError as e:
+                    print(f"创建模型缓存目录 {self.cache_dir} 失败，不缓存优化后的模型: {e}")
+            try:
+                session = ort.InferenceSession(decrypted_data, sess_options=options, providers=self.providers)
+                if work_dir is not None:
+                    self._save_cache(options.optimized_model_filepath, cache_path)
+            finally:
+                if work_dir is not None:
+                    _remove_work_dir(work_dir)
             
             return session
             
@@ -82,6 +196,20 @@ class YoloDetector:
             print(f"解密和加载模型 {model_path} 时出错: {e}")
             raise
     
+    def _save_cache(self, optimized_path, cache_path):
+        """加密保存优化后的模型，失败时只打印错误"""
+        try:
+            with open(optimized_path, 'rb') as file:
+                optimized_data = file.read()
+            if not optimized_data:
+                return
+            # 先写临时文件再替换，避免并发启动时读到不完整的缓存
+            with open(cache_path + '.tmp', 'wb') as file:
+                file.write(self.fernet.encrypt(optimized_data))
+            os.replace(cache_path + '.tmp', cache_path)
+        except Exception as e:
+            print(f"保存模型缓存 {cache_path} 失败: {e}")
+    
     def _init_model_info(self, model_type):
         """初始化模型信息"""
         session = self.models[model_type]
@@ -111,31 +239,67 @@ class YoloDetector:
             'class_dict': name_class_dict,
             'input_name': input_name,
             'output_name': output_name,
-            'input_shape': input_shape
+            'input_shape': input_shape,
+            # 固定的批次大小，动态批次时为None
+            'batch_size': input_shape[0] if isinstance(input_shape[0], int) and input_shape[0] > 0 else None
         }
     
-    def preprocess_image(self, img, input_shape):
-        """预处理图像以适应ONNX模型输入"""
-        # 调整图像大小以匹配模型输入尺寸
+    def _warmup(self, model_type):
+        """用空白图像推理一次，首次推理的内存分配和算子初始化放在加载阶段完成"""
+        info = self.model_info[model_type]
+        try:
+            input_data = self._input_buffer(model_type, info['batch_size'] or 1)
+            input_data.fill(0)
+            self.models[model_type].run([info['output_name']], {info['input_name']: input_data})
+        except Exception as e:
+            # 预热失败不影响使用，第一次检测时再初始化
+            print(f"{model_type}模型预热失败: {e}")
+    
+    @staticmethod
+    def _input_layout(input_shape):
+        """模型输入的高、宽以及是否为NCHW格式"""
         height, width = input_shape[2], input_shape[3] if len(input_shape) > 3 else input_shape[2]
-        img = cv2.resize(img, (width, height))
-        
-        # 转换为RGB（如果是BGR）
-        if img.shape[2] == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # 归一化图像 [0-255] -> [0-1]
-        img = img.astype(np.float32) / 255.0
-        
-        # 添加批次维度并转换为NCHW格式（如果需要）
-        if len(input_shape) == 4 and input_shape[1] == 3:  # NCHW格式
-            img = img.transpose(2, 0, 1)  # HWC -> CHW
-        
-        # 扩展批次维度
-        img = np.expand_dims(img, axis=0)
-        
-        return img
+        return height, width, len(input_shape) == 4 and input_shape[1] == 3
+    
+    def _input_buffer(self, model_type, batch):
+        """
+        获取预分配的输入张量，按模型类型和批次大小缓存，
+        同时缓存一个缩放用的uint8图像，检测时不再分配内存
+        """
+        buffers = getattr(self._buffers, 'tensors', None)
+        if buffers is None:
+            buffers = self._buffers.tensors = {}
+        key = (model_type, batch)
+        tensor = buffers.get(key)
+        if tensor is None:
+            height, width, nchw = self._input_layout(self.model_info[model_type]['input_shape'])
+            shape = (batch, 3, height, width) if nchw else (batch, height, width, 3)
+            tensor = buffers[key] = np.empty(shape, dtype=np.float32)
+            buffers.setdefault((model_type, 'resized'), np.empty((height, width, 3), dtype=np.uint8))
+        return tensor
+    
+    def _fill_input(self, tensor, index, img, resized, nchw):
+        """
+        把一张图像预处理后写入输入张量的第index个位置
+        缩放写入resized，BGR转RGB、归一化和HWC转CHW合并为一次乘法，直接写入张量
+        """
+        height, width = resized.shape[:2]
+        cv2.resize(img[:, :, :3], (width, height), dst=resized)
+        # 通道倒序即BGR->RGB
+        rgb = resized[:, :, ::-1]
+        if nchw:  # NCHW格式
+            rgb = rgb.transpose(2, 0, 1)
+        np.multiply(rgb, INPUT_SCALE, out=tensor[index], dtype=np.float32, casting='unsafe')
+    
+    def preprocess_image(self, img, input_shape):
+        """预处理图像以适应ONNX模型输入，返回新分配的 1xCxHxW（或1xHxWxC）张量"""
+        height, width, nchw = self._input_layout(input_shape)
+        shape = (1, 3, height, width) if nchw else (1, height, width, 3)
+        tensor = np.empty(shape, dtype=np.float32)
+        self._fill_input(tensor, 0, img, np.empty((height, width, 3), dtype=np.uint8), nchw)
+        return tensor
     
+    @metrics.measure('yolo.detect_regions')
     def detect_regions(self, img, model_type, recs):
         """
         使用指定类型的模型检测图像中的特定区域
@@ -151,20 +315,20 @@ class YoloDetector:
         if img is None:
             raise ValueError("必须提供图像参数img")
         
-        if model_type not in self.models:
-            raise ValueError(f"不支持的模型类型: {model_type}，可用类型: {list(self.models.keys())}")
+        if model_type not in self.model_paths:
+            raise ValueError(f"不支持的模型类型: {model_type}，可用类型: {list(self.model_paths.keys())}")
         
-        # 获取模型信息
-        session = self.models[model_type]
+        # 获取模型信息，第一次使用时加载模型
+        session = self._get_session(model_type)
         info = self.model_info[model_type]
         input_name = info['input_name']
         output_name = info['output_name']
         input_shape = info['input_shape']
         name_class_dict = info['class_dict']
         
-        results = []
-
-        # 对每个矩形区域进行裁剪和预测
+        # 裁剪所有区域，无效区域跳过
+        regions = []
+        crops = []
         for i, rect in enumerate(recs):
             x, y, w, h = rect
             
@@ -187,51 +351,60 @@ class YoloDetector:
                 print(f"警告: 区域 {i+1} 裁剪后为空，跳过")
                 continue
             
-            # 预处理图像
+            crops.append(cropped)
+            regions.append([x, y, w, h])
+        
+        if not crops:
+            return []
+        
+        # 所有区域预处理到同一个预分配的批次张量中推理，模型批次大小固定时分块推理
+        batch_size = info['batch_size'] or len(crops)
+        input_data = self._input_buffer(model_type, batch_size)
+        resized = self._buffers.tensors[(model_type, 'resized')]
+        nchw = self._input_layout(input_shape)[2]
+        outputs = []
+        for begin in range(0, len(crops), batch_size):
+            count = min(batch_size, len(crops) - begin)
             try:
-                input_data = self.preprocess_image(cropped, input_shape)
+                for index in range(count):
+                    self._fill_input(input_data, index, crops[begin + index], resized, nchw)
             except Exception as e:
-                print(f"预处理区域 {i+1} 时出错: {e}")
+                print(f"预处理区域 {regions[begin:begin + count]} 时出错: {e}")
+                outputs.extend([None] * count)
                 continue
-            
+            if count < batch_size:
+                # 固定批次的模型最后一块用空白输入补齐
+                input_data[count:] = 0
             try:
-                # 预热一次
-                _ = session.run([output_name], {input_name: input_data})
-                
-                # 多次测量取平均值，获得更稳定的时间
-                num_runs = 3
-                total_time = 0
-                for _ in range(num_runs):
-                    start_time = time.time()
-                    outputs = session.run([output_name], {input_name: input_data})
-                    total_time += (time.time() - start_time)
-                
-                inference_time = (total_time / num_runs) * 1000  # 转换为毫秒
-                
-                # 获取预测结果
-                output = outputs[0]
-                top1_cls = np.argmax(output)
-                top1_conf = float(output[0][top1_cls])
-                
-                # 将类别索引转换为字符串
-                model_class_name = name_class_dict.get(int(top1_cls), f"未知类别_{top1_cls}")
-                
-                # 打印类别索引和对应的真实类别名称
-                # print(f"区域 {i+1}:")
-                # print(f"  类别索引: {top1_cls}")
-                # print(f"  模型类别名称: {model_class_name}")
-                # print(f"  置信度: {top1_conf:.2f}")
-                # print(f"  推理耗时: {inference_time:.1f}ms")
-                
-                # 收集结果，置信度保留两位小数
-                results.append({
-                    "class_name": model_class_name,
-                    "confidence": round(float(top1_conf), 2),
-                    "region": [x, y, w, h]
-                })
+                # 模型已在加载时预热，这里只推理一次
+                if self.profile:
+                    start_time = time.perf_counter()
+                    output = session.run([output_name], {input_name: input_data})[0]
+                    metrics.record(f"yolo.{model_type}", time.perf_counter() - start_time)
+                else:
+                    output = session.run([output_name], {input_name: input_data})[0]
             except Exception as e:
-                print(f"处理区域 {i+1} 时出错: {e}")
+                print(f"处理区域 {regions[begin:begin + count]} 时出错: {e}")
+                output = [None] * count
+            outputs.extend(output[:count])
+        
+        results = []
+        for region, output in zip(regions, outputs):
+            if output is None:
                 continue
+            # 获取预测结果
+            top1_cls = int(np.argmax(output))
+            top1_conf = float(output[top1_cls])
+            
+            # 将类别索引转换为字符串
+            model_class_name = name_class_dict.get(top1_cls, f"未知类别_{top1_cls}")
+            
+            # 收集结果，置信度保留两位小数
+            results.append({
+                "class_name": model_class_name,
+                "confidence": round(top1_conf, 2),
+                "region": region
+            })
         
         return results
     
@@ -0,0 +1,232 @@
+"""
+运行指标模块
+统计截图、匹配、OCR、YOLO、鼠标操作和等待等各阶段的耗时，
+按时间窗口滚动保存为对数分桶直方图（HDR风格），可以随时查询p50/p95/p99
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+from backend.img_api import Cv
+
+# 每个2的幂区间内的线性子桶数（2**SUB_BITS），相对误差约1/16
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+# 记录的最大耗时：2**27微秒（约134秒），更长的耗时计入最后一个桶
+MAX_EXP = 27
+BUCKET_COUNT = (MAX_EXP - SUB_BITS + 2) * SUB_COUNT
+# 滚动窗口：WINDOW_COUNT个WINDOW_SECONDS秒的时间片
+WINDOW_SECONDS = 10
+WINDOW_COUNT = 6
+
+
+def _bucket_index(us: int) -> int:
+    """微秒耗时对应的桶序号：小于SUB_COUNT时每微秒一个桶，之后每个2的幂区间分SUB_COUNT个桶"""
+    if us < SUB_COUNT:
+        return max(us, 0)
+    exp = us.bit_length() - 1
+    if exp > MAX_EXP:
+        return BUCKET_COUNT - 1
+    return (exp - SUB_BITS + 1) * SUB_COUNT + ((us >> (exp - SUB_BITS)) & (SUB_COUNT - 1))
+
+
+def _bucket_upper(index: int) -> float:
+    """桶的上界（微秒）"""
+    if index < SUB_COUNT:
+        return float(index + 1)
+    exp = index // SUB_COUNT + SUB_BITS - 1
+    mantissa = index % SUB_COUNT
+    return float((SUB_COUNT + mantissa + 1) << (exp - SUB_BITS))
+
+
+_BUCKET_UPPER_MS = np.array([_bucket_upper(i) for i in range(BUCKET_COUNT)]) / 1000
+
+
+class LatencyHistogram:
+    """
+    滚动耗时直方图
+
+    当前时间片写满WINDOW_SECONDS秒后切换到下一个时间片，最老的时间片被清空，
+    所以查询结果反映最近WINDOW_SECONDS*WINDOW_COUNT秒内的耗时分布。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._counts = np.zeros((WINDOW_COUNT, BUCKET_COUNT), dtype=np.int64)
+        self._sums = np.zeros(WINDOW_COUNT)
+        self._maxes = np.zeros(WINDOW_COUNT)
+        self._slot = 0
+        self._slot_start = clock()
+        self.total = 0
+
+    def _rotate(self):
+        """切换过期的时间片"""
+        now = self._clock()
+        passed = int((now - self._slot_start) // WINDOW_SECONDS)
+        if passed <= 0:
+            return
+        for _ in range(min(passed, WINDOW_COUNT)):
+            self._slot = (self._slot + 1) % WINDOW_COUNT
+            self._counts[self._slot] = 0
+            self._sums[self._slot] = 0
+            self._maxes[self._slot] = 0
+        self._slot_start += passed * WINDOW_SECONDS
+
+    def record(self, seconds: float):
+        """记录一次耗时（秒）"""
+        self._rotate()
+        ms = seconds * 1000
+        self._counts[self._slot, _bucket_index(int(seconds * 1e6))] += 1
+        self._sums[self._slot] += ms
+        if ms > self._maxes[self._slot]:
+            self._maxes[self._slot] = ms
+        self.total += 1
+
+    def summary(self, percentiles: Iterable[float] = (50, 95, 99)) -> Optional[Dict[str, float]]:
+        """
+        最近一段时间的统计（毫秒）
+        :return: {'count', 'mean', 'max', 'p50', 'p95', 'p99'}，没有数据时返回None
+        """
+        self._rotate()
+        counts = self._counts.sum(axis=0)
+        count = int(counts.sum())
+        if count == 0:
+            return None
+        cumulative = np.cumsum(counts)
+        result = {
+            'count': count,
+            'mean': float(self._sums.sum() / count),
+            'max': float(self._maxes.max()),
+        }
+        for p in percentiles:
+            index = int(np.searchsorted(cumulative, count * p / 100))
+            # 桶上界可能超过实际最大值
+            result[f'p{p:g}'] = float(min(_BUCKET_UPPER_MS[index], result['max']))
+        return result
+
+
+class Metrics:
+    """
+    各阶段耗时统计
+
+    使用示例：
+    ```python
+    with metrics.span('ocr.detect'):
+        ...
+    metrics.record('screencap', elapsed)
+    metrics.snapshot()
+    ```
+    默认关闭，由系统设置metrics_enabled开启（见set_enabled），关闭时包装的方法直接调用原方法
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def set_enabled(self, enabled: bool):
+        """开启或关闭统计，关闭时同时移除Cv匹配监听器，匹配函数不再计时"""
+        self.enabled = bool(enabled)
+        if self.enabled and not self._listening:
+            Cv.add_match_listener(self._on_match)
+            self._listening = True
+        elif not self.enabled and self._listening:
+            Cv.remove_match_listener(self._on_match)
+            self._listening = False
+
+    def record(self, stage: str, seconds: float):
+        """记录一次耗时（秒）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """统计with块的耗时"""
+        t_begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t_begin)
+
+    def timed(self, stage: str, func):
+        """包装函数，开启统计时每次调用记录耗时"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            t_begin = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - t_begin)
+        return wrapper
+
+    def measure(self, stage: str):
+        """方法装饰器，在类定义中使用，效果同timed"""
+        return functools.partial(self.timed, stage)
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        所有阶段最近一段时间的统计，按总耗时从大到小排序
+        :param prefix: 只返回以prefix开头的阶段
+        """
+        with self._lock:
+            items = [(stage, histogram.summary()) for stage, histogram in self._histograms.items()
+                     if prefix is None or stage.startswith(prefix)]
+        items = [(stage, summary) for stage, summary in items if summary is not None]
+        items.sort(key=lambda item: -item[1]['mean'] * item[1]['count'])
+        return dict(items)
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._histograms.clear()
+
+    # ---------- 挂接 ----------
+
+    def instrument(self, obj: Any, methods: Iterable[str], prefix: str):
+        """
+        用实例属性替换对象的方法，统计每次调用的耗时，阶段名称为 prefix.方法名
+        :param obj: 要统计的对象，为None时忽略
+        :param methods: 方法名列表
+        :param prefix: 阶段名称前缀
+        """
+        if obj is None:
+            return
+        for name in methods:
+            method = getattr(obj, name, None)
+            if method is None or getattr(method, '_metrics_stage', None):
+                continue
+            wrapper = self.timed(f"{prefix}.{name}", method)
+            wrapper._metrics_stage = True
+            setattr(obj, name, wrapper)
+
+    def instrument_emulator(self, api: Dict[str, Any]):
+        """
+        统计paras.emulator_api中各对象的耗时
+        YoloDetector.detect_regions和脚本的等待在类定义中用measure统计
+        :param api: paras.emulator_api
+        """
+        self.instrument(api.get('cap'), ['screencap'], 'cap')
+        self.instrument(api.get('mouse'), ['click', 'swipe'], 'mouse')
+        self.instrument(api.get('ocr'), ['only_text', 'detect'], 'ocr')
+
+    def _on_match(self, kind: str, templates: Any, result: Any, elapsed: float):
+        """Cv匹配监听器：MultiMatch/SingleMatch按调用统计，TemplateMatch/FeatureMatch按模板名称统计"""
+        if kind in ('TemplateMatch', 'FeatureMatch'):
+            name = getattr(templates, 'name', '') or '未命名'
+            self.record(f"{kind}.{name}", elapsed)
+        else:
+            self.record(kind, elapsed)
+
+
+# 全局统计实例
+metrics = Metrics()
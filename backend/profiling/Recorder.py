@@ -0,0 +1,245 @@
+"""
+会话录制模块
+录制截图、匹配结果、OCR结果和鼠标操作，用于离线性能分析和回放
+"""
+import copy
+import functools
+import logging
+import queue
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+from backend.global_var import paras
+from backend.img_api import Cv
+from backend.emulators.FrameArchive import FrameArchiveWriter
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 事件日志文件名
+EVENTS_NAME = "events.json"
+# 事件日志的列
+EVENT_COLUMNS = ("t", "kind", "name", "args", "result", "elapsed_ms", "frame")
+
+
+def _jsonable(obj: Any) -> Any:
+    """把numpy类型、元组和匹配结果转换成可以json序列化的数据"""
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Cv.MatchResult):
+        return {'name': obj.name, 'rect': _jsonable(obj.rect), 'score': _jsonable(obj.score), 'count': _jsonable(obj.count)}
+    if isinstance(obj, Cv.MatchResultContainer):
+        return {name: _jsonable(obj._results.get(name)) for name in obj.evaluated}
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    return str(obj)
+
+
+def template_names(templates: Any) -> List[str]:
+    """从SingleMatch/MultiMatch的模板参数中取出模板名称"""
+    if isinstance(templates, Cv.PreparedTemplate) or (
+            isinstance(templates, list) and len(templates) == 3 and isinstance(templates[0], str)):
+        templates = [templates]
+    names = []
+    for template_info in templates:
+        unpacked = Cv._unpack_template(template_info)
+        names.append(unpacked[0] if unpacked is not None else "")
+    return names
+
+
+class SessionRecorder:
+    """
+    会话录制器
+
+    通过替换截图、鼠标和OCR对象的实例方法以及注册Cv匹配监听器来录制一次运行：
+    - 整帧截图写入帧归档（关键帧+异或差分PNG），区域截图只记录事件
+    - 匹配、OCR、点击和滑动记录为按列存储的事件日志 events.json
+    编码和写文件都在后台写入线程中完成，脚本线程只复制画面并放入队列，
+    队列满时丢弃画面而不是阻塞脚本。
+
+    使用示例：
+    ```python
+    recorder = SessionRecorder("session.zip")
+    recorder.attach()      # 默认录制paras.emulator_api中的对象
+    ...                    # 运行脚本
+    recorder.close()
+    ```
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = 30, queue_size: int = 64):
+        """
+        :param path: 归档文件路径
+        :param keyframe_interval: 关键帧间隔
+        :param queue_size: 写入队列长度，队列满时丢弃画面
+        """
+        self.path = path
+        self._archive = FrameArchiveWriter(path, keyframe_interval)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._columns: Dict[str, List[Any]] = {column: [] for column in EVENT_COLUMNS}
+        self._patched = []
+        self._frame_count = 0        # 已放入队列的帧数
+        self._last_stream_seq = None  # 后台截图模式下最近录制的帧序号
+        self.dropped_frames = 0
+        self.start_time = time.time()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="SessionRecorder", daemon=True)
+        self._writer.start()
+
+    # ---------- 挂接 ----------
+
+    def attach(self, cap: Any = None, mouse: Any = None, ocr: Any = None):
+        """
+        开始录制，参数为None时使用paras.emulator_api中的对象
+        :param cap: 截图对象
+        :param mouse: 鼠标对象
+        :param ocr: OCR对象
+        """
+        cap = cap if cap is not None else paras.emulator_api['cap']
+        mouse = mouse if mouse is not None else paras.emulator_api['mouse']
+        ocr = ocr if ocr is not None else paras.emulator_api['ocr']
+        if cap is not None:
+            self._patch(cap, 'screencap', functools.partial(self._wrap_screencap, cap))
+        if mouse is not None:
+            self._patch(mouse, 'click', functools.partial(self._wrap_call, 'click'))
+            self._patch(mouse, 'swipe', functools.partial(self._wrap_call, 'swipe'))
+        if ocr is not None:
+            self._patch(ocr, 'only_text', functools.partial(self._wrap_call, 'only_text'))
+            self._patch(ocr, 'detect', functools.partial(self._wrap_call, 'detect'))
+        Cv.add_match_listener(self._on_match)
+        # 记录脚本相关设置，回放时恢复
+        self._archive.set_meta(settings={
+            'gathering_items': copy.deepcopy(paras.gathering_items),
+            'fish_settings': copy.deepcopy(paras.fish_settings),
+        })
+        logger.info(f"开始录制会话: {self.path}")
+
+    def detach(self):
+        """停止录制，恢复被替换的方法"""
+        Cv.remove_match_listener(self._on_match)
+        for obj, attr, previous in self._patched:
+            if previous is not None:
+                setattr(obj, attr, previous)
+            else:
+                try:
+                    delattr(obj, attr)
+                except AttributeError:
+                    pass
+        self._patched = []
+
+    def _patch(self, obj: Any, attr: str, wrapper):
+        """用实例属性覆盖方法，detach时恢复原来的实例属性（如运行指标的包装）或删除实例属性"""
+        original = getattr(obj, attr, None)
+        if original is None:
+            return
+        previous = getattr(obj, '__dict__', {}).get(attr)
+        setattr(obj, attr, wrapper(original))
+        self._patched.append((obj, attr, previous))
+
+    def _wrap_screencap(self, cap, original):
+        @functools.wraps(original)
+        def screencap(region=None):
+            t_begin = time.perf_counter()
+            image = original(region)
+            elapsed = time.perf_counter() - t_begin
+            if image is not None and region is None:
+                self._add_frame(cap, image)
+            self._add_event('screencap', '', region, None if image is None else image.shape[:2], elapsed)
+            return image
+        return screencap
+
+    def _wrap_call(self, kind: str, original):
+        @functools.wraps(original)
+        def call(*args, **kwargs):
+            t_begin = time.perf_counter()
+            result = original(*args, **kwargs)
+            elapsed = time.perf_counter() - t_begin
+            # OCR的第一个参数是图像，不记录
+            if kind in ('only_text', 'detect'):
+                args = args[1:]
+            # 参数统一记录为{'args': 位置参数, 'kwargs': 关键字参数}
+            self._add_event(kind, '', {'args': args, 'kwargs': kwargs}, result, elapsed)
+            return result
+        return call
+
+    def _on_match(self, kind: str, templates: Any, result: Any, elapsed: float):
+        """Cv匹配监听器，只记录SingleMatch/MultiMatch的调用"""
+        if kind not in ('SingleMatch', 'MultiMatch'):
+            return
+        self._add_event(kind, ','.join(template_names(templates)), None, result, elapsed)
+
+    # ---------- 脚本线程 ----------
+
+    def _add_frame(self, cap: Any, image: np.ndarray):
+        """复制画面放入写入队列，后台截图模式下同一帧只录制一次"""
+        if getattr(cap, 'is_streaming', None) is not None and cap.is_streaming():
+            if cap.frame_seq == self._last_stream_seq:
+                return
+            self._last_stream_seq = cap.frame_seq
+        try:
+            self._queue.put_nowait(('frame', time.time(), image.copy()))
+            self._frame_count += 1
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def _add_event(self, kind: str, name: str, args: Any, result: Any, elapsed: float):
+        """事件放入写入队列，result在写入线程中序列化"""
+        event = (time.time(), kind, name, args, result, elapsed * 1000, self._frame_count - 1)
+        try:
+            self._queue.put_nowait(('event', event))
+        except queue.Full:
+            # 事件很小，队列满时等待写入线程而不是丢弃
+            self._queue.put(('event', event))
+
+    # ---------- 写入线程 ----------
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                if item[0] == 'frame':
+                    self._archive.add(item[2], item[1])
+                else:
+                    for column, value in zip(EVENT_COLUMNS, item[1]):
+                        if column in ('args', 'result'):
+                            value = _jsonable(value)
+                        self._columns[column].append(value)
+            except Exception as e:
+                logger.error(f"录制写入失败: {e}")
+
+    def close(self):
+        """停止录制，写入事件日志并关闭归档"""
+        if self._closed:
+            return
+        self._closed = True
+        self.detach()
+        self._queue.put(None)
+        self._writer.join()
+        self._archive.write_json(EVENTS_NAME, self._columns)
+        self._archive.set_meta(start_time=self.start_time, end_time=time.time(),
+                               frames=len(self._archive), dropped_frames=self.dropped_frames)
+        self._archive.close()
+        logger.info(f"会话录制完成: {self.path}，帧数 {self._frame_count}，丢弃 {self.dropped_frames}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_events(reader) -> Optional[Dict[str, List[Any]]]:
+    """
+    从帧归档中读取事件日志
+    :param reader: FrameArchiveReader对象
+    :return: 按列存储的事件日志，没有事件日志时返回None
+    """
+    return reader.read_json(EVENTS_NAME)
@@ -0,0 +1,334 @@
+"""
+离线回放模块
+用录制的会话驱动Gather/Fish/GoldSaucer脚本，使用虚拟时钟代替真实等待，
+统计决策速度、各阶段耗时以及与录制时操作的差异
+
+运行: python -m backend.profiling.Replay gather session.zip [--repeat N]
+"""
+import argparse
+import copy
+import importlib
+import logging
+import time
+import types
+from typing import Any, Dict, List, Optional, Tuple
+from backend.global_var import paras
+from backend.img_api import Cv
+from backend.emulators.Mouse import Touch
+from backend.emulators.ReplayCap import ReplayCap
+from backend.emulators.FrameArchive import FrameArchiveReader
+from backend.profiling.Recorder import load_events, template_names
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 脚本名称: (模块, 类名)
+SCRIPTS = {
+    'gather': ('backend.script.gather', 'Gather'),
+    'fish': ('backend.script.fish', 'Fish'),
+    'goldsaucer': ('backend.script.goldsaucer', 'GoldSaucer'),
+}
+
+# 判断点击一致的最大坐标差（像素）
+CLICK_TOLERANCE = 10
+
+
+class VirtualClock:
+    """
+    虚拟时钟
+
+    sleep只推进虚拟时间不真正等待，time返回虚拟时间。
+    as_module返回一个替代time模块的对象，替换脚本模块中的time后，
+    脚本里的time.time()/time.sleep()都使用虚拟时间。
+    虚拟时间超过deadline后调用on_deadline，防止不截图的等待循环停不下来。
+    """
+
+    def __init__(self, start: float = 0.0, deadline: Optional[float] = None):
+        self.now = start
+        self.deadline = deadline
+        self.on_deadline = None
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+        if self.deadline is not None and self.now > self.deadline and self.on_deadline is not None:
+            self.on_deadline()
+
+    def as_module(self) -> types.SimpleNamespace:
+        """生成替代time模块的对象，未覆盖的函数使用真实的time模块"""
+        module = types.SimpleNamespace(**{name: getattr(time, name) for name in dir(time) if not name.startswith('_')})
+        module.time = self.time
+        module.sleep = self.sleep
+        module.monotonic = self.time
+        return module
+
+
+class FakeMouse(Touch):
+    """记录点击和滑动的鼠标，等待时间使用虚拟时钟"""
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.actions: List[Tuple[float, str, Any]] = []
+
+    def click(self, x: int, y: int, waittime: int = 0.1, duration: int = 100, clicks: int = 1):
+        self.actions.append((self.clock.time(), 'click', [int(x), int(y)]))
+        self.clock.sleep(duration / 1000 * clicks + 0.1 * (clicks - 1) + waittime)
+
+    def swipe(self, points: List[Tuple[int, int]], waittime: int = 0.1, duration: int = 500):
+        self.actions.append((self.clock.time(), 'swipe', [[int(x), int(y)] for x, y in points]))
+        self.clock.sleep(duration / 1000 + waittime)
+
+
+class FakeKeyboard:
+    """记录按键操作的键盘"""
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.actions: List[Tuple[float, str, Any]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.actions.append((self.clock.time(), name, list(args)))
+        return record
+
+
+class StageStats:
+    """按阶段收集耗时"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, elapsed: float):
+        self.samples.setdefault(stage, []).append(elapsed * 1000)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """每个阶段的次数、平均、p50、p95耗时（毫秒）"""
+        result = {}
+        for stage, values in sorted(self.samples.items(), key=lambda item: -sum(item[1])):
+            values = sorted(values)
+            result[stage] = {
+                'count': len(values),
+                'mean_ms': sum(values) / len(values),
+                'p50_ms': values[len(values) // 2],
+                'p95_ms': values[int(len(values) * 0.95)],
+            }
+        return result
+
+
+def _call_arg(call: Dict[str, Any], index: int, name: str) -> Any:
+    """从录制的调用参数{'args': [...], 'kwargs': {...}}中按位置或名称取出参数"""
+    args = call['args']
+    return args[index] if index < len(args) else call['kwargs'][name]
+
+
+def recorded_actions(reader: FrameArchiveReader) -> List[Tuple[float, str, Any]]:
+    """从录制的事件日志中取出点击和滑动操作，时间相对于第一帧"""
+    events = load_events(reader)
+    if not events:
+        return []
+    t0 = reader.timestamps[0] if reader.timestamps else 0.0
+    actions = []
+    for t, kind, call in zip(events['t'], events['kind'], events['args']):
+        if kind == 'click':
+            actions.append((t - t0, kind, [int(_call_arg(call, 0, 'x')), int(_call_arg(call, 1, 'y'))]))
+        elif kind == 'swipe':
+            actions.append((t - t0, kind, [[int(x), int(y)] for x, y in _call_arg(call, 0, 'points')]))
+    return actions
+
+
+def compare_actions(recorded: List[Tuple[float, str, Any]], replayed: List[Tuple[float, str, Any]],
+                    tolerance: int = CLICK_TOLERANCE) -> Dict[str, Any]:
+    """
+    按顺序比较录制和回放的操作
+    :return: {'recorded': 录制操作数, 'replayed': 回放操作数, 'matched': 一致的前缀长度,
+              'first_divergence': 第一处不一致的序号（完全一致时为None）}
+    """
+    def same(a, b):
+        if a[1] != b[1]:
+            return False
+        if a[1] == 'click':
+            return abs(a[2][0] - b[2][0]) <= tolerance and abs(a[2][1] - b[2][1]) <= tolerance
+        return a[2] == b[2]
+
+    matched = 0
+    for a, b in zip(recorded, replayed):
+        if not same(a, b):
+            break
+        matched += 1
+    diverged = matched < max(len(recorded), len(replayed))
+    return {
+        'recorded': len(recorded),
+        'replayed': len(replayed),
+        'matched': matched,
+        'first_divergence': matched if diverged else None,
+    }
+
+
+class ReplayHarness:
+    """
+    离线回放测试
+
+    使用示例：
+    ```python
+    harness = ReplayHarness('gather', 'session.zip')
+    report = harness.run()
+    print_report(report)
+    ```
+    """
+
+    def __init__(self, script: str, source: str, ocr: Any = None, max_virtual_time: Optional[float] = None):
+        """
+        :param script: 脚本名称，见SCRIPTS
+        :param source: 录制的帧归档、图片目录或视频
+        :param ocr: OCR对象，为None时使用paras.emulator_api中的OCR，没有时创建Ocr()
+        :param max_virtual_time: 最长回放的虚拟时间（秒），默认为录制时长加10秒
+        """
+        if script not in SCRIPTS:
+            raise ValueError(f"不支持的脚本: {script}")
+        self.script = script
+        self.source = source
+        self.ocr = ocr
+        self.max_virtual_time = max_virtual_time
+
+    def _load_ocr(self):
+        if self.ocr is not None:
+            return self.ocr
+        if paras.emulator_api['ocr'] is not None:
+            return paras.emulator_api['ocr']
+        try:
+            from backend.img_api.Ocr import Ocr
+            return Ocr()
+        except Exception as e:
+            print(f"OCR初始化失败，回放中不进行文字识别: {e}")
+            return None
+
+    def run(self) -> Dict[str, Any]:
+        """运行一次回放，返回统计报告"""
+        clock = VirtualClock()
+        cap = ReplayCap(self.source, speed=1.0, clock=clock.time)
+        mouse = FakeMouse(clock)
+        keyboard = FakeKeyboard(clock)
+        stages = StageStats()
+        duration = cap.timestamps[-1] if len(cap) else 0.0
+        clock.deadline = self.max_virtual_time if self.max_virtual_time is not None else duration + 10
+
+        # 读取录制时的操作和设置
+        recorded = []
+        settings = {}
+        if cap._archive is not None:
+            recorded = recorded_actions(cap._archive)
+            settings = cap._archive.meta.get('settings', {})
+
+        module_name, class_name = SCRIPTS[self.script]
+        # 脚本模块和全局API互相导入，先导入全局API避免循环导入
+        importlib.import_module('backend.global_var.api')
+        module = importlib.import_module(module_name)
+        saved_api = dict(paras.emulator_api)
+        saved_settings = {name: copy.deepcopy(getattr(paras, name)) for name in settings if hasattr(paras, name)}
+        saved_time = module.time
+        instance = None
+        state = {'screencaps': 0, 'last_capture': None}
+
+        # 截图：和MuMuCap一样按帧率节流，播放结束后停止脚本
+        original_screencap = cap.screencap
+
+        def screencap(region=None):
+            if state['last_capture'] is not None:
+                clock.sleep(state['last_capture'] + 1.0 / cap.fps - clock.time())
+            state['last_capture'] = clock.time()
+            t_begin = time.perf_counter()
+            image = original_screencap(region)
+            stages.add('screencap', time.perf_counter() - t_begin)
+            state['screencaps'] += 1
+            if cap.finished and instance is not None:
+                instance.stop()
+            return image
+        cap.screencap = screencap
+
+        def on_match(kind, templates, result, elapsed):
+            stages.add(f"{kind}[{','.join(template_names(templates))}]", elapsed)
+
+        try:
+            # 注入回放对象和录制时的设置
+            module.time = clock.as_module()
+            for name, value in settings.items():
+                if hasattr(paras, name):
+                    setattr(paras, name, copy.deepcopy(value))
+            paras.emulator_api.update(cap=cap, mouse=mouse, keyboard=keyboard, ocr=self._load_ocr())
+            Cv.add_match_listener(on_match)
+
+            instance = getattr(module, class_name)()
+            clock.on_deadline = instance.stop
+            wall_begin = time.perf_counter()
+            try:
+                instance.run()
+            except Exception as e:
+                logger.error(f"回放脚本出错: {e}", exc_info=True)
+            wall = time.perf_counter() - wall_begin
+        finally:
+            Cv.remove_match_listener(on_match)
+            module.time = saved_time
+            paras.emulator_api.clear()
+            paras.emulator_api.update(saved_api)
+            for name, value in saved_settings.items():
+                setattr(paras, name, value)
+            cap.close()
+
+        decisions = sum(len(v) for k, v in stages.samples.items() if k.startswith(('SingleMatch', 'MultiMatch')))
+        return {
+            'script': self.script,
+            'source': self.source,
+            'frames': len(cap),
+            'screencaps': state['screencaps'],
+            'decisions': decisions,
+            'wall_s': wall,
+            'virtual_s': clock.time(),
+            'speedup': clock.time() / wall if wall > 0 else float('inf'),
+            'decisions_per_s': decisions / wall if wall > 0 else float('inf'),
+            'stages': stages.summary(),
+            'divergence': compare_actions(recorded, mouse.actions),
+            'actions': mouse.actions,
+            'keys': keyboard.actions,
+        }
+
+
+def print_report(report: Dict[str, Any], top: int = 15):
+    """打印回放报告"""
+    print(f"脚本: {report['script']}  来源: {report['source']}")
+    print(f"帧数: {report['frames']}  截图次数: {report['screencaps']}  决策次数: {report['decisions']}")
+    print(f"耗时: {report['wall_s']:.2f}秒  虚拟时间: {report['virtual_s']:.1f}秒  "
+          f"加速: {report['speedup']:.1f}x  决策/秒: {report['decisions_per_s']:.1f}")
+    print("各阶段耗时:")
+    for stage, stats in list(report['stages'].items())[:top]:
+        print(f"  {stats['count']:6d}次  平均 {stats['mean_ms']:7.2f}ms  p50 {stats['p50_ms']:7.2f}ms  "
+              f"p95 {stats['p95_ms']:7.2f}ms  {stage}")
+    divergence = report['divergence']
+    if divergence['recorded'] == 0:
+        print(f"录制中没有操作记录，回放操作: {divergence['replayed']}个")
+    elif divergence['first_divergence'] is None:
+        print(f"操作与录制一致: {divergence['matched']}个")
+    else:
+        print(f"操作与录制不一致: 录制{divergence['recorded']}个，回放{divergence['replayed']}个，"
+              f"前{divergence['matched']}个一致，第{divergence['first_divergence'] + 1}个开始不一致")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", choices=sorted(SCRIPTS))
+    parser.add_argument("source", help="录制的帧归档(.zip)、图片目录或视频")
+    parser.add_argument("--repeat", type=int, default=1, help="重复回放次数")
+    parser.add_argument("--max-time", type=float, default=None, help="最长回放的虚拟时间（秒）")
+    args = parser.parse_args()
+
+    for _ in range(args.repeat):
+        print_report(ReplayHarness(args.script, args.source, max_virtual_time=args.max_time).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+性能分析模块初始化文件
+包含会话录制、离线回放和运行指标统计
+"""
@@ -2,7 +2,8 @@ import time
 from ..global_var import api as G_api
 from ..global_var import paras as G_para
 from ..img_api.Img_load import ImageLoader
-from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor
+from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor, MatchCache
+from ..profiling.Metrics import metrics
 
 
 
@@ -16,6 +17,7 @@ class Fish:
         self.mouse = G_para.emulator_api['mouse']
         self.keyboard = G_para.emulator_api['keyboard']
         self.imgs = None
+        self.match_cache = MatchCache()    # 画面未变化时复用匹配结果
         self.load_img_paras()
         self.paras = {
             # 'is_fishing': False,     # 是否正在钓鱼
@@ -29,35 +31,35 @@ class Fish:
         imgs = ImageLoader()
         self.imgs = {
             # 开始钓鱼
-            '开始钓鱼': ["开始钓鱼", imgs.开始钓鱼, {'method': 'Template', 'region': [1085,548,71,49]}],
+            '开始钓鱼': imgs.prepare("开始钓鱼", {'method': 'Template', 'region': [1085,548,71,49]}),
             # 结束钓鱼
-            '结束钓鱼': ["结束钓鱼", imgs.结束钓鱼, {'method': 'Template', 'region': [1085,549,58,43]}],
+            '结束钓鱼': imgs.prepare("结束钓鱼", {'method': 'Template', 'region': [1085,549,58,43]}),
             # 钓鱼收藏品确认
-            '钓鱼收藏品确认': ["钓鱼收藏品确认", imgs.钓鱼收藏品确认, {'method': 'Template', 'region': [769,514,106,49]}],
+            '钓鱼收藏品确认': imgs.prepare("钓鱼收藏品确认", {'method': 'Template', 'region': [769,514,106,49]}),
             # 提交收藏品
-            '提交收藏品': ["提交收藏品", imgs.提交收藏品, {'method': 'Template', 'region': [1060,593,82,40]}],
+            '提交收藏品': imgs.prepare("提交收藏品", {'method': 'Template', 'region': [1060,593,82,40]}),
             # 以小钓大
-            '以小钓大': ["以小钓大", imgs.以小钓大, {'method': 'Template', 'region': [1090,398,53,50], 'color_sensitive': True}],
+            '以小钓大': imgs.prepare("以小钓大", {'method': 'Template', 'region': [1090,398,53,50], 'color_sensitive': True}),
 
             # 角色按钮
-            '角色按钮': ["角色按钮", imgs.角色按钮, {'method': 'Template', 'region': [961,19,40,36]}],
+            '角色按钮': imgs.prepare("角色按钮", {'method': 'Template', 'region': [961,19,40,36]}),
             # 角色ui
-            '角色ui': ["角色ui", imgs.角色ui, {'method': 'Template', 'region': [102,4,82,48]}],
+            '角色ui': imgs.prepare("角色ui", {'method': 'Template', 'region': [102,4,82,48]}),
             # 关闭按钮
-            '关闭按钮': ["关闭按钮", imgs.关闭按钮, {'method': 'Template', 'region': [1228,18,20,19],'color_sensitive': True}],
+            '关闭按钮': imgs.prepare("关闭按钮", {'method': 'Template', 'region': [1228,18,20,19],'color_sensitive': True}),
 
         }
 
 
     # 钓鱼
     def start_fishing(self):
-        result = MultiMatch(self.cap.screencap(), [self.imgs['开始钓鱼'],self.imgs['结束钓鱼'], self.imgs['以小钓大']])
+        result = MultiMatch(self.cap.screencap(), [self.imgs['开始钓鱼'],self.imgs['结束钓鱼'], self.imgs['以小钓大']], cache=self.match_cache)
         if result.开始钓鱼:
             self.logs.debug("开始钓鱼")
             self.paras['fish_nums'] += 1
             self.logs.debug(f"钓鱼次数：{self.paras['fish_nums']}")
             while self.running:
-                if SingleMatch(self.cap.screencap(), self.imgs['结束钓鱼']):
+                if SingleMatch(self.cap.screencap(), self.imgs['结束钓鱼'], cache=self.match_cache):
                     return
                 if result.以小钓大 and G_para.fish_settings['small_to_big']:
                     self.logs.debug("以小钓大")
@@ -71,7 +73,7 @@ class Fish:
                 self.mouse.click(1070,640,0.2) # 点一下坐下，取消后摇
                 self.mouse.click(result.结束钓鱼.rect[0]+8, result.结束钓鱼.rect[1]+8, 2)
                 while self.running:
-                    cash = MultiMatch(self.cap.screencap(), [self.imgs['开始钓鱼'],self.imgs['钓鱼收藏品确认']])
+                    cash = MultiMatch(self.cap.screencap(), [self.imgs['开始钓鱼'],self.imgs['钓鱼收藏品确认']], first_found=True, cache=self.match_cache)
                     if cash.开始钓鱼:
                         return
                     elif cash.钓鱼收藏品确认:
@@ -89,7 +91,7 @@ class Fish:
     # 维修装备-37分钟
     def repair_equipment(self):
         if time.time()-self.paras['repair_time'] > 60*37 and G_para.fish_settings['need_repair']:
-            result = MultiMatch(self.cap.screencap(), [self.imgs['角色按钮'], self.imgs['角色ui'], self.imgs['关闭按钮']])
+            result = MultiMatch(self.cap.screencap(), [self.imgs['角色按钮'], self.imgs['角色ui'], self.imgs['关闭按钮']], first_found=True)
             if result.角色按钮:
                 self.mouse.swipe([[230,545], [300,545]], 3, 1000)   # 取消钓鱼
                 self.mouse.click(result.角色按钮.rect[0], result.角色按钮.rect[1], 1.5)
@@ -143,6 +145,8 @@ class Fish:
 
 
 
+    # 统计等待耗时，区分循环变慢是等待还是识别造成的
+    @metrics.measure('fish.sleep')
     def time_sleep(self, time_value):
         t_begin = time.time()
         while(self.running):
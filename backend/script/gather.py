@@ -2,9 +2,14 @@ import time
 from ..global_var import api as G_api
 from ..global_var import paras as G_para
 from ..img_api.Img_load import ImageLoader
-from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor
-from ..data.gather_info import gather_info
+from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor, MatchCache
+from ..profiling.Metrics import metrics
+from ..img_api.TextTracker import ScrollTextTracker
+from ..img_api.TextMatcher import BKTree
+from ..data.gather_index import gather_items
 
+# 采集物品名称词典，用于纠正OCR结果
+gather_names = BKTree(gather_items)
 
 
 class Gather:
@@ -17,6 +22,7 @@ class Gather:
         self.mouse = G_para.emulator_api['mouse']
         self.keyboard = G_para.emulator_api['keyboard']
         self.imgs = None
+        self.match_cache = MatchCache()    # 画面未变化时复用匹配结果
         self.load_img_paras()
         self.paras = {
             'repair_time': time.time(),     # 维修装备时间
@@ -34,47 +40,47 @@ class Gather:
         imgs = ImageLoader()
         self.imgs = {
             # 主界面
-            '主界面': ["主界面", imgs.主界面, {'method': 'Template', 'region': [58,619,350,92]}],
+            '主界面': imgs.prepare("主界面", {'method': 'Template', 'region': [58,619,350,92]}),
             # 关闭按钮
-            '关闭按钮': ["关闭按钮", imgs.关闭按钮, {'method': 'Template', 'region': [1228,18,20,19],'color_sensitive': True}],
+            '关闭按钮': imgs.prepare("关闭按钮", {'method': 'Template', 'region': [1228,18,20,19],'color_sensitive': True}),
             # 切换职业
-            '切换职业': ["切换职业", imgs.切换职业, {'method': 'Template', 'region': [575,200,127,48]}],
+            '切换职业': imgs.prepare("切换职业", {'method': 'Template', 'region': [575,200,127,48]}),
             # 采集笔记按钮
-            '采集笔记按钮': ["采集笔记按钮", imgs.采集笔记按钮, {'method': 'Template', 'region': [1185,294,42,37]}],
+            '采集笔记按钮': imgs.prepare("采集笔记按钮", {'method': 'Template', 'region': [1185,294,42,37]}),
             # 采集笔记ui
-            '采集笔记ui': ["采集笔记ui", imgs.采集笔记ui, {'method': 'Template', 'region': [192,7,95,45]}],
+            '采集笔记ui': imgs.prepare("采集笔记ui", {'method': 'Template', 'region': [192,7,95,45]}),
             # 寻路按钮
-            '寻路按钮': ["寻路按钮", imgs.寻路按钮, {'method': 'Template', 'region': [271,117,856,557]}],
+            '寻路按钮': imgs.prepare("寻路按钮", {'method': 'Template', 'region': [271,117,856,557]}),
             # 取消寻路按钮
-            '取消寻路按钮': ["取消寻路按钮", imgs.取消寻路按钮, {'method': 'Template', 'region': [271,117,856,557]}],
+            '取消寻路按钮': imgs.prepare("取消寻路按钮", {'method': 'Template', 'region': [271,117,856,557]}),
             # 寻路中
-            '寻路中': ["寻路中", imgs.寻路中, {'method': 'Template', 'region': [527,521,218,41]}],
+            '寻路中': imgs.prepare("寻路中", {'method': 'Template', 'region': [527,521,218,41]}),
             # 飞行中
-            '飞行中': ["飞行中", imgs.飞行中, {'method': 'Template', 'region': [1098,511,44,31]}],
+            '飞行中': imgs.prepare("飞行中", {'method': 'Template', 'region': [1098,511,44,31]}),
             # 可挖草
-            '可挖草': ["可挖草", imgs.可挖草, {'method': 'Template', 'region': [718,334,33,37]}],
+            '可挖草': imgs.prepare("可挖草", {'method': 'Template', 'region': [718,334,33,37]}),
             # 可挖矿
-            '可挖矿': ["可挖矿", imgs.可挖矿, {'method': 'Template', 'region': [717,328,35,37]}],
+            '可挖矿': imgs.prepare("可挖矿", {'method': 'Template', 'region': [717,328,35,37]}),
             # 获得力不足
-            '获得力不足': ["获得力不足", imgs.获得力不足, {'method': 'Template', 'region': [479,62,153,183]}],
+            '获得力不足': imgs.prepare("获得力不足", {'method': 'Template', 'region': [479,62,153,183]}),
             # 角色按钮
-            '角色按钮': ["角色按钮", imgs.角色按钮, {'method': 'Template', 'region': [961,19,40,36]}],
+            '角色按钮': imgs.prepare("角色按钮", {'method': 'Template', 'region': [961,19,40,36]}),
             # 角色ui
-            '角色ui': ["角色ui", imgs.角色ui, {'method': 'Template', 'region': [102,4,82,48]}],
+            '角色ui': imgs.prepare("角色ui", {'method': 'Template', 'region': [102,4,82,48]}),
             # 切换攻击
-            '切换攻击': ["切换攻击", imgs.切换攻击, {'method': 'Template', 'region': [1190,632,28,27]}],
+            '切换攻击': imgs.prepare("切换攻击", {'method': 'Template', 'region': [1190,632,28,27]}),
             # 寻路中断
-            '寻路中断': ["寻路中断", imgs.寻路中断, {'method': 'Template', 'region': [451,91,210,155]}],
+            '寻路中断': imgs.prepare("寻路中断", {'method': 'Template', 'region': [451,91,210,155]}),
             # 无法寻路
-            '无法寻路': ["无法寻路", imgs.无法寻路, {'method': 'Template', 'region': [534,59,145,152]}],
+            '无法寻路': imgs.prepare("无法寻路", {'method': 'Template', 'region': [534,59,145,152]}),
             # 采集中无法寻路
-            '采集中无法寻路': ["采集中无法寻路", imgs.采集中无法寻路, {'method': 'Template', 'region': [487,67,218,125]}],
+            '采集中无法寻路': imgs.prepare("采集中无法寻路", {'method': 'Template', 'region': [487,67,218,125]}),
             # 骑乘中
-            '骑乘中': ["骑乘中", imgs.骑乘中, {'method': 'Template', 'region': [858,620,26,31]}],
+            '骑乘中': imgs.prepare("骑乘中", {'method': 'Template', 'region': [858,620,26,31]}),
             # 采矿工
-            '采矿工': ["采矿工", imgs.采矿工, {'method': 'Template', 'region': [442,649,38,37]}],
+            '采矿工': imgs.prepare("采矿工", {'method': 'Template', 'region': [442,649,38,37]}),
             # 园艺工
-            '园艺工': ["园艺工", imgs.园艺工, {'method': 'Template', 'region': [442,649,38,37]}],
+            '园艺工': imgs.prepare("园艺工", {'method': 'Template', 'region': [442,649,38,37]}),
         }
 
     # 更新采集列表
@@ -88,7 +94,7 @@ class Gather:
             if value['need'] > value['complete']:
                 self.paras['gather_name'] = key
                 self.logs.debug(f'更新当前采集物品为【{self.paras["gather_name"]}】')
-                required_job = gather_info[self.paras['gather_name']]['job']
+                required_job = gather_items[self.paras['gather_name']].job
                 self.logs.debug(f'所需职业: {required_job}')
                 self.switch_job(required_job)
                 return
@@ -98,7 +104,7 @@ class Gather:
 
     # 打开采集笔记并寻路
     def open_gather_note(self):
-        result = MultiMatch(self.cap.screencap(), [self.imgs['采集笔记按钮'], self.imgs['寻路按钮'], self.imgs['取消寻路按钮'], self.imgs['飞行中']])
+        result = MultiMatch(self.cap.screencap(), [self.imgs['飞行中'], self.imgs['采集笔记按钮'], self.imgs['寻路按钮'], self.imgs['取消寻路按钮']], first_found=True, cache=self.match_cache)
         # 飞行中先下坐骑
         if result.飞行中:
             self.logs.debug(f'检测到飞行中状态，执行下坐骑操作')
@@ -112,8 +118,8 @@ class Gather:
             if SingleMatch(screencap, self.imgs['采集笔记ui']):
                 if self.paras['old_gather_name'] != self.paras['gather_name']: # 是否重选
                     self.logs.debug(f'需要重选笔记中的采集物品')
-                    self.choose_level(gather_info[self.paras['gather_name']]['level'])
-                    self.choose_item(gather_info[self.paras['gather_name']]['note_index'])
+                    self.choose_level(gather_items[self.paras['gather_name']].level)
+                    self.choose_item(gather_items[self.paras['gather_name']].note_index)
                     self.paras['old_gather_name'] = self.paras['gather_name']
                 self.mouse.click(880,440,2) # 点击采集点
             else:
@@ -133,7 +139,7 @@ class Gather:
             zhongduan_flag = False
             while self.running:
                 self.time_sleep(0.1)
-                result = MultiMatch(self.cap.screencap(), [self.imgs['寻路中'], self.imgs['主界面'], self.imgs['可挖草'], self.imgs['可挖矿'], self.imgs['关闭按钮'], self.imgs['寻路中断'], self.imgs['无法寻路'], self.imgs['采集中无法寻路']])
+                result = MultiMatch(self.cap.screencap(), [self.imgs['寻路中'], self.imgs['主界面'], self.imgs['可挖草'], self.imgs['可挖矿'], self.imgs['关闭按钮'], self.imgs['寻路中断'], self.imgs['无法寻路'], self.imgs['采集中无法寻路']], parallel=True, cache=self.match_cache)
                 
                 if result.寻路中 and not xunlu_flag:
                     xunlu_flag = True  
@@ -201,7 +207,7 @@ class Gather:
 
     # 开始采集
     def start_gather(self):
-        result = MultiMatch(self.cap.screencap(), [self.imgs['可挖草'], self.imgs['可挖矿']])
+        result = MultiMatch(self.cap.screencap(), [self.imgs['可挖草'], self.imgs['可挖矿']], first_found=True, cache=self.match_cache)
         if result.可挖草 or result.可挖矿:
             self.logs.debug(f'检测到可采集物品，开始采集流程')
             # 计算采集进度
@@ -214,16 +220,20 @@ class Gather:
             gather_list = []    # 采集列表中的物品
             gather_list_len_old = len(gather_list) # 采集列表中的物品数量，用于判断是否滑动到底部
             gather_poi = None   # 需要采集的物品位置
+            tracker = ScrollTextTracker(self.ocr, [20,61,212,232])  # 滑动后只识别新露出的行
             # 找到需要采集的位置
             while self.running:
-                ocr_result = self.ocr.detect(self.cap.screencap(), [20,61,212,232])
+                ocr_result = tracker.update(self.cap.screencap())
                 # 遍历ocr结果，找到需要采集的物品
                 for key,value in ocr_result.items():
-                    if key == self.paras['gather_name']:  # 找到了需要采集的物品
+                    name = gather_names.nearest(key)  # 纠正为编辑距离最近的物品名称，不是采集物品时为None
+                    if name is None:
+                        continue
+                    if name == self.paras['gather_name']:  # 找到了需要采集的物品
                         gather_poi = (370, int(value[1]+value[3]/2))
                         break
-                    elif key in gather_info and key not in gather_list:  # 不是需要采集的物品，但是是采集列表中的物品
-                        gather_list.append(key)
+                    elif name not in gather_list:  # 不是需要采集的物品，但是是采集列表中的物品
+                        gather_list.append(name)
                 # 如果找到了需要采集的物品，则跳出循环，否则滑动，重新检测
                 if gather_poi:
                     break
@@ -239,7 +249,7 @@ class Gather:
             # 连按采集
             while self.running and gather_poi:
                 self.time_sleep(0.1)
-                result = MultiMatch(self.cap.screencap(), [self.imgs['主界面'], self.imgs['获得力不足']])
+                result = MultiMatch(self.cap.screencap(), [self.imgs['获得力不足'], self.imgs['主界面']], first_found=True, cache=self.match_cache)
                 if result.获得力不足:
                     self.logs.error("需要维修装备")
                     self.paras['need_repair'] = True
@@ -343,7 +353,7 @@ class Gather:
 
     # 维修装备
     def repair_equipment(self):
-        result = MultiMatch(self.cap.screencap(), [self.imgs['角色按钮'], self.imgs['角色ui'], self.imgs['关闭按钮']])
+        result = MultiMatch(self.cap.screencap(), [self.imgs['角色按钮'], self.imgs['角色ui'], self.imgs['关闭按钮']], first_found=True)
         if result.角色按钮:
             self.logs.debug(f'检测到角色按钮，点击角色按钮')
             self.mouse.click(result.角色按钮.rect[0], result.角色按钮.rect[1], 1.5)
@@ -450,7 +460,7 @@ class Gather:
             t_begin = time.time()
             self.mouse.click(963, 646, 1)       # 下坐骑
             while self.running:
-                if SingleMatch(self.cap.screencap(), self.imgs['骑乘中']):
+                if SingleMatch(self.cap.screencap(), self.imgs['骑乘中'], cache=self.match_cache):
                     if time.time()-t_begin >= 8:
                         self.logs.warning("下坐骑超时")
                         self.paras['is_stuck'] = True
@@ -517,6 +527,8 @@ class Gather:
         self.running = False
 
 
+    # 统计等待耗时，区分循环变慢是等待还是识别造成的
+    @metrics.measure('gather.sleep')
     def time_sleep(self, time_value):
         t_begin = time.time()
         while(self.running):
@@ -3,7 +3,8 @@ import time
 from ..global_var import api as G_api
 from ..global_var import paras as G_para
 from ..img_api.Img_load import ImageLoader
-from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor
+from ..img_api.Cv import MultiMatch, SingleMatch, CompareColor, MatchCache
+from ..profiling.Metrics import metrics
 
 
 
@@ -18,6 +19,7 @@ class GoldSaucer:
         self.mouse = G_para.emulator_api['mouse']
         self.keyboard = G_para.emulator_api['keyboard']
         self.imgs = None
+        self.match_cache = MatchCache()    # 画面未变化时复用匹配结果
         self.load_img_paras()
         self.paras = {
             'ball_nums': 1,    # 单场抓球次数
@@ -28,25 +30,25 @@ class GoldSaucer:
         imgs = ImageLoader()
         self.imgs = {
             # 开始金蝶小游戏
-            '开始金蝶小游戏': ["开始金蝶小游戏", imgs.开始金蝶小游戏, {'method': 'Template', 'region': [711,323,72,53]}],
+            '开始金蝶小游戏': imgs.prepare("开始金蝶小游戏", {'method': 'Template', 'region': [711,323,72,53]}),
             # 金蝶小游戏确认
-            '金蝶小游戏确认': ["金蝶小游戏确认", imgs.金蝶小游戏确认, {'method': 'Template', 'region': [734,434,84,44]}],
+            '金蝶小游戏确认': imgs.prepare("金蝶小游戏确认", {'method': 'Template', 'region': [734,434,84,44]}),
             # 莫古翻倍挑战
-            '莫古翻倍挑战': ["莫古翻倍挑战", imgs.莫古翻倍挑战, {'method': 'Template', 'region': [770,525,107,41]}],
+            '莫古翻倍挑战': imgs.prepare("莫古翻倍挑战", {'method': 'Template', 'region': [770,525,107,41]}),
             # 莫古抓球再战
-            '莫古抓球再战': ["莫古抓球再战", imgs.莫古抓球再战, {'method': 'Template', 'region': [1090,639,90,48]}],
+            '莫古抓球再战': imgs.prepare("莫古抓球再战", {'method': 'Template', 'region': [1090,639,90,48]}),
             
             
             # 莫古红球
-            '莫古红球': ["莫古红球", imgs.莫古红球, {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}],
+            '莫古红球': imgs.prepare("莫古红球", {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}),
             # 莫古紫球
-            '莫古紫球': ["莫古紫球", imgs.莫古紫球, {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}],
+            '莫古紫球': imgs.prepare("莫古紫球", {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}),
             # 莫古蓝球
-            '莫古蓝球': ["莫古蓝球", imgs.莫古蓝球, {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}],
+            '莫古蓝球': imgs.prepare("莫古蓝球", {'method': 'Template', 'region': [828,250,334,292], 'color_sensitive': True}),
             # 抓球左
-            '抓球左': ["抓球左", imgs.抓球左, {'method': 'Template', 'region': [876,554,85,36], 'color_sensitive': True}],
+            '抓球左': imgs.prepare("抓球左", {'method': 'Template', 'region': [876,554,85,36], 'color_sensitive': True}),
             # 抓球右
-            '抓球右': ["抓球右", imgs.抓球右, {'method': 'Template', 'region': [1030,553,71,39], 'color_sensitive': True}],
+            '抓球右': imgs.prepare("抓球右", {'method': 'Template', 'region': [1030,553,71,39], 'color_sensitive': True}),
 
         }
 
@@ -55,7 +57,7 @@ class GoldSaucer:
 
 
     def auto_play(self):
-        result = MultiMatch(self.cap.screencap(), [self.imgs['开始金蝶小游戏'], self.imgs['金蝶小游戏确认'], self.imgs['莫古翻倍挑战'], self.imgs['莫古抓球再战'], self.imgs['抓球左'], self.imgs['抓球右']])
+        result = MultiMatch(self.cap.screencap(), [self.imgs['开始金蝶小游戏'], self.imgs['金蝶小游戏确认'], self.imgs['莫古翻倍挑战'], self.imgs['莫古抓球再战'], self.imgs['抓球左'], self.imgs['抓球右']], first_found=True, cache=self.match_cache)
 
         if result.开始金蝶小游戏:
             self.mouse.click(result.开始金蝶小游戏.rect[0], result.开始金蝶小游戏.rect[1], 0.5)
@@ -73,7 +75,8 @@ class GoldSaucer:
                 self.time_sleep(1)
             else:
                 self.time_sleep(0.3)
-            cash = SingleMatch(self.cap.screencap(), self.imgs['莫古红球']) or SingleMatch(self.cap.screencap(), self.imgs['莫古紫球']) or SingleMatch(self.cap.screencap(), self.imgs['莫古蓝球'])
+            screencap = self.cap.screencap()
+            cash = SingleMatch(screencap, self.imgs['莫古红球']) or SingleMatch(screencap, self.imgs['莫古紫球']) or SingleMatch(screencap, self.imgs['莫古蓝球'])
             self.paras['ball_cash'] = cash
             if cash:
                 if self.paras['ball_nums'] <= 2:
@@ -104,6 +107,8 @@ class GoldSaucer:
         self.running = False
 
 
+    # 统计等待耗时，区分循环变慢是等待还是识别造成的
+    @metrics.measure('goldsaucer.sleep')
     def time_sleep(self, time_value):
         t_begin = time.time()
         while(self.running):
@@ -2,7 +2,7 @@ import threading
 import logging
 import time
 from backend.script.gather import Gather
-from backend.data.gather_info import gather_info  # 导入采集物品信息
+from backend.data.gather_index import gather_items  # 导入采集物品索引
 from backend.global_var import paras as Gva  # 导入全局变量
 
 logger = logging.getLogger(__name__)
@@ -77,12 +77,12 @@ class GatheringApi:
         try:
             # 将字典转换为前端需要的格式
             items = []
-            for item_name, item_info in gather_info.items():
+            for item in gather_items.values():
                 items.append({
-                    "value": item_name,  # 使用物品名称作为唯一值
-                    "label": item_name,  # 显示名称
-                    "job": item_info["job"],  # 职业
-                    "level": item_info["level"]  # 等级
+                    "value": item.name,  # 使用物品名称作为唯一值
+                    "label": item.name,  # 显示名称
+                    "job": item.job,  # 职业
+                    "level": item.level  # 等级
                 })
             
             # 按等级排序
@@ -122,10 +122,11 @@ class GatheringApi:
                     # 如果已经完成但没有记录结束时间，设置为当前时间
                     item_info["end_time"] = current_time
                 
-                # 添加来自gather_info的信息
-                if item_name in gather_info:
-                    item_info["job"] = gather_info[item_name].get("job", "")
-                    item_info["level"] = gather_info[item_name].get("level", 0)
+                # 添加来自采集物品索引的信息
+                gather_item = gather_items.get(item_name)
+                if gather_item is not None:
+                    item_info["job"] = gather_item.job
+                    item_info["level"] = gather_item.level
                 
                 items_with_info[item_name] = item_info
             
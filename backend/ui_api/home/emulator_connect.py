@@ -9,8 +9,7 @@ from backend.emulators.Get_emulators_list import Get_emulators_list
 from backend.emulators.MuMuCap import MuMuCap
 from backend.emulators.Mouse import MouseController
 from backend.img_api.Ocr import Ocr
-from backend.emulators.Keyboard import Keyboard
-import win32gui
+from backend.profiling.Metrics import metrics
 import time
 
 class EmulatorConnect:
@@ -117,14 +116,23 @@ class EmulatorConnect:
             
             # 加载模拟器api
             self.logger.info("开始加载模拟器API")
+            # 停止旧截图对象的后台截图线程，否则线程一直持有旧对象，模拟器连接也不会断开
+            old_cap = paras.emulator_api.get('cap')
+            if old_cap is not None and hasattr(old_cap, 'stop_stream'):
+                old_cap.stop_stream()
             paras.emulator_api['cap'] = MuMuCap(target_emulator['编号'], paras.sys_settings['mumuPath'])
             paras.emulator_api['cap'].set_fps(paras.sys_settings['screenshot_fps'])
+            if paras.sys_settings.get('screenshot_stream'):
+                paras.emulator_api['cap'].start_stream()
             paras.emulator_api['mouse'] = MouseController(
                 emulator_type='mumu',
                 emulator_install_path=paras.sys_settings['mumuPath'],
                 instance_index=paras.emulator_info['index']
                 
             )
+            # 键盘依赖pywin32，只在连接模拟器时导入，其他模块可以在非Windows环境下导入
+            from backend.emulators.Keyboard import Keyboard
+            import win32gui
             paras.emulator_api['keyboard'] = Keyboard(win32gui.FindWindow(None, paras.emulator_info['name']))
             
             # 初始化OCR模块，添加异常处理
@@ -139,6 +147,9 @@ class EmulatorConnect:
                     'emulatorInfo': paras.emulator_info
                 }
             
+            # 开启运行指标时统计截图、鼠标和OCR的耗时
+            if paras.sys_settings.get('metrics_enabled'):
+                metrics.instrument_emulator(paras.emulator_api)
             self.logger.info("模拟器API加载完成")
             
             self.logger.info(f"成功连接到模拟器: {target_emulator['名称']}")
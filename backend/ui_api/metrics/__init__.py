@@ -0,0 +1,5 @@
+"""
+运行指标API模块初始化文件
+"""
+
+from .api import MetricsAPI
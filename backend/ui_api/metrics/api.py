@@ -0,0 +1,54 @@
+"""
+运行指标API模块，提供给前端显示各阶段耗时的接口
+"""
+import logging
+from backend.profiling.Metrics import metrics
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class MetricsAPI:
+    """
+    运行指标API类，提供截图、匹配、OCR、鼠标操作等阶段最近一段时间的耗时统计
+    """
+    def __init__(self):
+        """初始化运行指标API"""
+        self.window = None
+
+    def set_window(self, window):
+        """设置窗口引用"""
+        self.window = window
+
+    def get_metrics(self, prefix=None):
+        """
+        获取各阶段的耗时统计
+
+        参数:
+            prefix: 只返回名称以prefix开头的阶段，例如"TemplateMatch"、"ocr"
+
+        返回的data按总耗时从大到小排序，每项为 阶段名称: {count, mean, max, p50, p95, p99}，单位毫秒
+        """
+        try:
+            return {
+                "success": True,
+                "data": metrics.snapshot(prefix)
+            }
+        except Exception as e:
+            print(f"获取运行指标失败: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def reset_metrics(self):
+        """清空耗时统计"""
+        try:
+            metrics.reset()
+            return {"success": True}
+        except Exception as e:
+            print(f"清空运行指标失败: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
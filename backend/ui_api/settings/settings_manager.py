@@ -15,6 +15,7 @@ if str(root_dir) not in sys.path:
 
 # 导入全局变量模块
 from backend.global_var import paras as Gv_paras
+from backend.profiling.Metrics import metrics
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -35,7 +36,9 @@ class SettingsManager:
         self.default_settings = {
             "mumuPath": "",
             "logRetentionCount": 300,
-            "screenshotFps": 15
+            "screenshotFps": 15,
+            "screenshotStream": False,
+            "metricsEnabled": False
         }
         
         # 当前设置
@@ -104,12 +107,15 @@ class SettingsManager:
             mapping = {
                 "mumuPath": "mumuPath",
                 "logRetentionCount": "log_retention_count",
-                "screenshotFps": "screenshot_fps"
+                "screenshotFps": "screenshot_fps",
+                "screenshotStream": "screenshot_stream",
+                "metricsEnabled": "metrics_enabled"
             }
             
             for settings_key, global_key in mapping.items():
                 if settings_key in self.settings:
                     Gv_paras.sys_settings[global_key] = self.settings[settings_key]
+            metrics.set_enabled(Gv_paras.sys_settings['metrics_enabled'])
                     
             logger.info("成功同步设置到Gv_paras.sys_settings")
         except Exception as e:
@@ -0,0 +1,5 @@
+"""
+性能基准测试
+在仓库根目录运行，例如: python -m benchmarks.bench_multimatch
+完整的基准测试套件和回归比较: python -m benchmarks.suite（基线保存在benchmarks/baseline.json）
+"""
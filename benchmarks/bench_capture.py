@@ -0,0 +1,76 @@
+"""
+MuMuCap 像素缓冲区转换对比
+比较旧的 花式索引+cvtColor 转换与单次cvtColor+原地翻转写入轮换缓冲区的耗时和内存分配，
+不需要运行模拟器，像素缓冲区用随机数据填充
+
+运行: python -m benchmarks.bench_capture [--rounds N]
+"""
+import argparse
+import ctypes
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from backend.emulators.MuMuCap import MuMuCap, FRAME_BUFFER_COUNT
+from benchmarks.synthetic import FRAME_SIZE
+
+
+def fake_cap(width, height, seed=0):
+    """构造一个不连接模拟器的MuMuCap，像素缓冲区填充随机数据"""
+    cap = MuMuCap.__new__(MuMuCap)
+    cap.width, cap.height = width, height
+    cap.buffer_size = width * height * 4
+    cap.pixels = (ctypes.c_ubyte * cap.buffer_size)()
+    rng = np.random.default_rng(seed)
+    np.frombuffer(cap.pixels, dtype=np.uint8)[:] = rng.integers(0, 256, cap.buffer_size, dtype=np.uint8)
+    cap._frame_buffers = {}
+    cap._frame_buffer_index = {}
+    cap._buffer_count = FRAME_BUFFER_COUNT
+    return cap
+
+
+def legacy_convert(cap):
+    """旧版_buffer_to_opencv"""
+    pixel_array = np.frombuffer(cap.pixels, dtype=np.uint8).reshape((cap.height, cap.width, 4))
+    return cv2.cvtColor(pixel_array[::-1, :, [2, 1, 0]], cv2.COLOR_RGBA2RGB)
+
+
+def bench(fn, rounds):
+    """返回 (排序后的每次耗时列表(毫秒), rounds次调用期间tracemalloc记录的内存峰值(字节))"""
+    fn()  # 预热，轮换缓冲区在这里分配
+    times = []
+    for _ in range(rounds):
+        t_begin = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t_begin) * 1000)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(rounds):
+        fn()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(times), peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    height, width = FRAME_SIZE
+    cap = fake_cap(width, height)
+
+    # 两种转换结果必须一致
+    assert np.array_equal(legacy_convert(cap), cap._buffer_to_opencv())
+
+    print(f"画面: {width}x{height}  轮数: {args.rounds}")
+    for label, fn in (("旧版", lambda: legacy_convert(cap)),
+                      ("新版", cap._buffer_to_opencv),
+                      ("区域 300x200", lambda: cap._region_to_opencv(100, 50, 300, 200))):
+        times, peak_bytes = bench(fn, args.rounds)
+        print(f"{label}: p50 {times[len(times) // 2]:.2f}ms  p95 {times[int(len(times) * 0.95)]:.2f}ms  "
+              f"内存峰值 {peak_bytes / 1024 / 1024:.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+MultiMatch 串行/并行对比
+使用Gather寻路等待循环中的8模板轮询，比较串行和线程池并行的耗时
+
+运行: python -m benchmarks.bench_multimatch [--workers N] [--rounds N]
+"""
+import argparse
+import os
+import time
+import cv2
+from backend.img_api import Cv
+from benchmarks.synthetic import GATHER_POLL, prepare, make_frame
+
+
+def bench(fn, rounds):
+    """返回每次调用的耗时列表（毫秒）"""
+    fn()  # 预热
+    times = []
+    for _ in range(rounds):
+        t_begin = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t_begin) * 1000)
+    return sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=None, help="并行线程数，默认min(4, CPU核数)")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--limit-opencv-threads", action="store_true", help="并行时把OpenCV内部线程数调整为 CPU核数 // 线程数")
+    args = parser.parse_args()
+
+    templates = prepare(GATHER_POLL)
+    frame = make_frame(templates, paste={"主界面"})
+
+    serial_threads = cv2.getNumThreads()
+    serial = bench(lambda: Cv.MultiMatch(frame, templates), args.rounds)
+    workers = Cv.set_match_workers(args.workers, args.limit_opencv_threads)
+    parallel = bench(lambda: Cv.MultiMatch(frame, templates, parallel=True), args.rounds)
+
+    # 两种模式结果必须一致
+    assert str(Cv.MultiMatch(frame, templates)) == str(Cv.MultiMatch(frame, templates, parallel=True))
+
+    print(f"CPU核数: {os.cpu_count()}  模板数: {len(templates)}  轮数: {args.rounds}")
+    print(f"串行  (OpenCV线程 {serial_threads}): p50 {serial[len(serial) // 2]:.2f}ms  p95 {serial[int(len(serial) * 0.95)]:.2f}ms")
+    print(f"并行  (线程池 {workers}, OpenCV线程 {cv2.getNumThreads()}): p50 {parallel[len(parallel) // 2]:.2f}ms  p95 {parallel[int(len(parallel) * 0.95)]:.2f}ms")
+    print(f"加速比(p50): {serial[len(serial) // 2] / parallel[len(parallel) // 2]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
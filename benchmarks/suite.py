@@ -0,0 +1,343 @@
+"""
+视觉流水线基准测试套件
+覆盖Cv(TemplateMatch/MultiMatch/FeatureMatch/CompareColor/GetHsv)、Ocr和Yolo的热点路径，
+输入是用backend/imgs中的模板合成的截图，不需要模拟器；缺少依赖或模型的测试会跳过。
+结果按asv风格保存为JSON，可以和保存的基线比较，变慢超过阈值时返回非0。
+
+运行:
+    python -m benchmarks.suite                          # 运行全部并和基线比较
+    python -m benchmarks.suite -k template --rounds 50  # 只运行名称包含template的测试
+    python -m benchmarks.suite --save-baseline          # 更新基线
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import cv2
+import numpy as np
+from backend.img_api import Cv
+from benchmarks.synthetic import (GOLDSAUCER_BALLS, SCRIPT_POLLS, FRAME_SIZE, load_template, prepare, make_frame)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# 超过基线的比例，超过即视为性能退化
+REGRESSION_THRESHOLD = 0.2
+
+# 注册的基准测试: 名称 -> 准备函数，准备函数返回被计时的无参函数
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    """缺少依赖或模型时跳过测试"""
+
+
+# 代码错误，准备测试时遇到这些异常不跳过，直接报错
+CODE_ERRORS = (AttributeError, TypeError, NameError)
+
+
+def benchmark(name):
+    """注册基准测试的装饰器"""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+# ---------- TemplateMatch ----------
+
+# 不同大小的ROI: (模板, 区域)
+TEMPLATE_CASES = [
+    ("关闭按钮", [1228, 18, 20, 19]),       # 小区域
+    ("寻路中断", [451, 91, 210, 155]),      # 中等区域
+    ("莫古红球", [828, 250, 334, 292]),     # 大区域
+]
+
+
+def _register_template_cases():
+    for name, region in TEMPLATE_CASES:
+        for use_mask in (True, False):
+            for color_sensitive in (False, True):
+                label = f"template/{name}/{region[2]}x{region[3]}/{'mask' if use_mask else 'nomask'}" \
+                        f"{'/color' if color_sensitive else ''}"
+
+                def setup(name=name, region=region, use_mask=use_mask, color_sensitive=color_sensitive):
+                    img = load_template(name)
+                    if not use_mask:
+                        img = np.ascontiguousarray(img[:, :, :3])
+                    params = {'method': 'Template', 'region': region, 'color_sensitive': color_sensitive}
+                    template = Cv.PreparedTemplate(name, img, params)
+                    frame = make_frame([template])
+                    return lambda: Cv.TemplateMatch(frame, template, region, color_sensitive=color_sensitive)
+                benchmark(label)(setup)
+
+
+_register_template_cases()
+
+
+# ---------- MultiMatch ----------
+
+def _register_multimatch_cases():
+    for script, table in SCRIPT_POLLS.items():
+        def setup(table=table, **kwargs):
+            templates = prepare(table)
+            # 只贴最后一个模板，first_found模式需要检查全部模板
+            frame = make_frame(templates, paste={templates[-1].name})
+            return lambda: Cv.MultiMatch(frame, templates, **kwargs)
+        benchmark(f"multimatch/{script}")(setup)
+        benchmark(f"multimatch/{script}/first_found")(
+            lambda setup=setup: setup(first_found=True))
+        benchmark(f"multimatch/{script}/cached")(
+            lambda setup=setup: setup(cache=Cv.MatchCache()))
+
+
+_register_multimatch_cases()
+
+
+@benchmark("multimatch/goldsaucer_balls")
+def bench_balls():
+    templates = prepare(GOLDSAUCER_BALLS)
+    frame = make_frame(templates, paste={"莫古蓝球"})
+    return lambda: Cv.MultiMatch(frame, templates)
+
+
+# ---------- FeatureMatch ----------
+
+def _register_feature_cases():
+    for detector in Cv._DETECTOR_FACTORIES:
+        def setup(detector=detector):
+            name, region = "切换职业", [500, 300, 300, 200]
+            params = {'method': 'Feature', 'region': region, 'detector': detector}
+            template = Cv.PreparedTemplate(name, load_template(name), params)
+            frame = make_frame([template])
+            return lambda: Cv.FeatureMatch(frame, template, region, detector=detector)
+        benchmark(f"feature/{detector}")(setup)
+
+
+_register_feature_cases()
+
+
+# ---------- CompareColor / GetHsv ----------
+
+POIS = [[447, 48], [450, 48], [455, 48]]
+
+
+@benchmark("color/CompareColor")
+def bench_compare_color():
+    frame = make_frame([])
+    return lambda: Cv.CompareColor(frame, POIS, 'ffffff-020202')
+
+
+@benchmark("color/GetHsv")
+def bench_get_hsv():
+    frame = make_frame([])
+    return lambda: Cv.GetHsv(frame, POIS)
+
+
+# ---------- Ocr ----------
+
+OCR_REGIONS = [[20, 61, 212, 40], [20, 121, 212, 40], [20, 181, 212, 40]]
+
+
+def _ocr_frame():
+    """在合成截图上写几行数字和字母"""
+    frame = make_frame([])
+    for i, (x, y, w, h) in enumerate(OCR_REGIONS):
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (40, 40, 40), -1)
+        cv2.putText(frame, f"Item {i + 1} 12/34", (x + 5, y + h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    return frame
+
+
+def _ocr():
+    try:
+        from backend.img_api.Ocr import Ocr
+    except ImportError as e:
+        raise SkipBenchmark(f"缺少OCR依赖: {e}")
+    try:
+        ocr = Ocr()
+        # 先识别一次确认模型可用
+        ocr.engine.get_rec_res([np.zeros((48, 160, 3), dtype=np.uint8)])
+    except CODE_ERRORS:
+        raise
+    except Exception as e:
+        raise SkipBenchmark(f"OCR模型加载失败: {e}")
+    return ocr
+
+
+@benchmark("ocr/only_text")
+def bench_only_text():
+    ocr = _ocr()
+    frame = _ocr_frame()
+    return lambda: ocr.only_text(frame, OCR_REGIONS)
+
+
+@benchmark("ocr/detect")
+def bench_detect():
+    ocr = _ocr()
+    frame = _ocr_frame()
+    return lambda: ocr.detect(frame, OCR_REGIONS)
+
+
+# ---------- Yolo ----------
+
+YOLO_REGIONS = {
+    'character': [[444, 270, 131, 156], [706, 270, 131, 156]],
+    'skill': [[350, 275, 68, 68], [600, 275, 68, 68], [855, 275, 68, 68]],
+    'talent': [[414, 259, 50, 50], [616, 259, 50, 50], [818, 259, 50, 50]],
+}
+_yolo = []
+
+
+def _yolo_detector():
+    if not _yolo:
+        try:
+            from backend.img_api.Yolo import YoloDetector
+        except ImportError as e:
+            raise SkipBenchmark(f"缺少YOLO依赖: {e}")
+        try:
+            detector = YoloDetector()
+            # 模型在第一次使用时才加载，先全部加载确认模型可用
+            detector.load_models()
+            _yolo.append(detector)
+        except CODE_ERRORS:
+            raise
+        except Exception as e:
+            raise SkipBenchmark(f"YOLO模型加载失败: {e}")
+    return _yolo[0]
+
+
+def _register_yolo_cases():
+    for model, regions in YOLO_REGIONS.items():
+        def setup(model=model, regions=regions):
+            detector = _yolo_detector()
+            frame = make_frame([])
+            return lambda: detector.detect_regions(frame, model, regions)
+        benchmark(f"yolo/detect_regions/{model}")(setup)
+
+
+_register_yolo_cases()
+
+
+# ---------- 运行和比较 ----------
+
+def run_benchmark(fn, rounds, min_time):
+    """预热一次后至少运行rounds次且总时间不少于min_time秒，返回每次耗时（毫秒）"""
+    fn()
+    samples = []
+    t_start = time.perf_counter()
+    while len(samples) < rounds or time.perf_counter() - t_start < min_time:
+        t_begin = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t_begin) * 1000)
+    return samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'unit': 'ms',
+        'rounds': len(samples),
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD, stat='min'):
+    """和基线比较，返回退化的测试名称列表
+    
+    默认比较最小耗时，受机器负载的影响比中位数小
+    """
+    regressions = []
+    print(f"\n{'测试':<48}{'基线' + stat:>12}{'当前' + stat:>12}{'比例':>8}")
+    for name, stats in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or stat not in stats:
+            continue
+        ratio = stats[stat] / base[stat] if base[stat] > 0 else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  退化'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = '  提升'
+        print(f"{name:<48}{base[stat]:>12.3f}{stats[stat]:>12.3f}{ratio:>8.2f}{flag}")
+    if baseline.get('machine') != machine_info():
+        print("注意: 基线是在不同的机器或环境上生成的，比较结果仅供参考")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default=None, help="只运行名称匹配该正则的测试")
+    parser.add_argument("--rounds", type=int, default=30, help="每个测试的最少运行次数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每个测试的最少运行时间（秒）")
+    parser.add_argument("--output", default=None, help="结果保存路径")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="退化阈值，默认0.2即慢20%%")
+    parser.add_argument("--stat", choices=("min", "median", "p95"), default="min", help="和基线比较的统计量")
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.pattern and not re.search(args.pattern, name):
+            continue
+        try:
+            fn = setup()
+        except SkipBenchmark as e:
+            results[name] = {'skipped': str(e)}
+            print(f"{name:<48}跳过: {e}")
+            continue
+        stats = summarize(run_benchmark(fn, args.rounds, args.min_time))
+        results[name] = stats
+        print(f"{name:<48}median {stats['median']:9.3f}ms  p95 {stats['p95']:9.3f}ms  ({stats['rounds']}次)")
+
+    report = {
+        'version': 1,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'frame_size': list(FRAME_SIZE),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        # 只更新本次运行的测试，保留基线中其他测试的结果
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                merged = json.load(f).get('results', {})
+        merged.update({k: v for k, v in results.items() if 'skipped' not in v})
+        baseline = dict(report, results=merged)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"已保存基线: {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold, args.stat)
+        if regressions:
+            print(f"\n{len(regressions)}个测试性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
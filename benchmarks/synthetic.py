@@ -0,0 +1,100 @@
+"""
+合成测试数据
+使用仓库自带的模板图片(backend/imgs)生成截图，无需模拟器即可运行
+"""
+import os
+import numpy as np
+import cv2
+from backend.img_api.Cv import PreparedTemplate
+
+IMGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "imgs")
+FRAME_SIZE = (720, 1280)
+
+# Gather.open_gather_note 寻路等待循环中的8个模板（与backend/script/gather.py一致）
+GATHER_POLL = [
+    ("寻路中", [527, 521, 218, 41]),
+    ("主界面", [58, 619, 350, 92]),
+    ("可挖草", [718, 334, 33, 37]),
+    ("可挖矿", [717, 328, 35, 37]),
+    ("关闭按钮", [1228, 18, 20, 19], {'color_sensitive': True}),
+    ("寻路中断", [451, 91, 210, 155]),
+    ("无法寻路", [534, 59, 145, 152]),
+    ("采集中无法寻路", [487, 67, 218, 125]),
+]
+
+# Fish.start_fishing 中的模板（与backend/script/fish.py一致）
+FISH_POLL = [
+    ("开始钓鱼", [1085, 548, 71, 49]),
+    ("结束钓鱼", [1085, 549, 58, 43]),
+    ("以小钓大", [1090, 398, 53, 50], {'color_sensitive': True}),
+    ("钓鱼收藏品确认", [769, 514, 106, 49]),
+]
+
+# GoldSaucer.auto_play 中的模板（与backend/script/goldsaucer.py一致）
+GOLDSAUCER_POLL = [
+    ("开始金蝶小游戏", [711, 323, 72, 53]),
+    ("金蝶小游戏确认", [734, 434, 84, 44]),
+    ("莫古翻倍挑战", [770, 525, 107, 41]),
+    ("莫古抓球再战", [1090, 639, 90, 48]),
+    ("抓球左", [876, 554, 85, 36], {'color_sensitive': True}),
+    ("抓球右", [1030, 553, 71, 39], {'color_sensitive': True}),
+]
+
+# GoldSaucer.auto_play 中在大区域内找球的模板
+GOLDSAUCER_BALLS = [
+    ("莫古红球", [828, 250, 334, 292], {'color_sensitive': True}),
+    ("莫古紫球", [828, 250, 334, 292], {'color_sensitive': True}),
+    ("莫古蓝球", [828, 250, 334, 292], {'color_sensitive': True}),
+]
+
+SCRIPT_POLLS = {
+    "gather": GATHER_POLL,
+    "fish": FISH_POLL,
+    "goldsaucer": GOLDSAUCER_POLL,
+}
+
+
+def load_template(name):
+    """读取模板图片（支持中文路径）"""
+    data = np.fromfile(os.path.join(IMGS_DIR, f"{name}.png"), dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+
+
+def prepare(table):
+    """将[(名称, 区域, 额外参数), ...]转换为PreparedTemplate列表"""
+    templates = []
+    for item in table:
+        name, region = item[0], item[1]
+        params = {'method': 'Template', 'region': region}
+        if len(item) > 2:
+            params.update(item[2])
+        templates.append(PreparedTemplate(name, load_template(name), params))
+    return templates
+
+
+def make_frame(templates, paste=None, seed=0):
+    """生成一张1280x720的合成截图
+    
+    参数:
+        templates: PreparedTemplate列表
+        paste: 需要贴到各自区域中心的模板名称，None表示全部贴上
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (*FRAME_SIZE, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (9, 9), 0)
+    for template in templates:
+        if paste is not None and template.name not in paste:
+            continue
+        img = template.img
+        h, w = img.shape[:2]
+        rx, ry, rw, rh = template.params['region']
+        x = rx + max(0, (rw - w) // 2)
+        y = ry + max(0, (rh - h) // 2)
+        if img.shape[2] == 4:
+            alpha = img[:, :, 3:4].astype(np.float32) / 255.0
+            patch = frame[y:y + h, x:x + w].astype(np.float32)
+            frame[y:y + h, x:x + w] = (img[:, :, :3] * alpha + patch * (1 - alpha)).astype(np.uint8)
+        else:
+            frame[y:y + h, x:x + w] = img
+    return frame
@@ -80,6 +80,15 @@ def main():
         print(f"警告: 资源目录 {res_path} 不存在，将创建空目录。")
         os.makedirs(res_path)
     
+    # 重新生成采集物品索引缓存，打包后没有gather_info.py源文件，无法检查缓存是否过期
+    gather_info_cache_path = os.path.join('backend', 'data', 'gather_info.json')
+    print("正在生成采集物品缓存...")
+    try:
+        subprocess.run([sys.executable, '-m', 'backend.data.gather_index'], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"错误: 生成采集物品缓存 {gather_info_cache_path} 失败: {e}")
+        sys.exit(1)
+    
     # --- 构建打包命令字符串 ---    
     cmd_str = (
         f'nuitka --mingw64 --standalone --show-progress '  # 移除 --windows-disable-console 以方便调试
@@ -91,6 +100,7 @@ def main():
         f'--include-data-dir={rapidocr_models_path}=rapidocr/models ' 
         f'--include-data-file={rapidocr_config_path}=rapidocr/config.yaml ' 
         f'--include-data-file={rapidocr_default_models_path}=rapidocr/default_models.yaml ' 
+        f'--include-data-file={gather_info_cache_path}=backend/data/gather_info.json ' 
         f'--enable-plugin=multiprocessing '  # 添加多进程支持
         f'--follow-imports '  # 自动跟踪导入
         f'--nofollow-import-to=numpy,onnxruntime,opencv_python '  # 这些包通常有自己的二进制文件处理方式
@@ -54,6 +54,15 @@ def main():
         if not os.path.exists(os.path.join(res_path, 'bin')):
             os.makedirs(os.path.join(res_path, 'bin'))
     
+    # 重新生成采集物品索引缓存，打包后没有gather_info.py源文件，无法检查缓存是否过期
+    gather_info_cache_path = os.path.join('backend', 'data', 'gather_info.json')
+    print("正在生成采集物品缓存...")
+    try:
+        subprocess.run([sys.executable, '-m', 'backend.data.gather_index'], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"错误: 生成采集物品缓存 {gather_info_cache_path} 失败: {e}")
+        sys.exit(1)
+    
     # --- 构建打包命令字符串 ---    
     # 基础PyInstaller命令
     cmd_str = (
@@ -70,6 +79,7 @@ def main():
         f'--add-data "{rapidocr_models_path};rapidocr/models" ' 
         f'--add-data "{rapidocr_config_path};rapidocr" ' 
         f'--add-data "{rapidocr_default_models_path};rapidocr" ' 
+        f'--add-data "{gather_info_cache_path};backend/data" ' 
     )
     
     # 检查图标文件是否存在，如果存在则添加